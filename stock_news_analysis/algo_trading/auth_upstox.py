@@ -2,11 +2,11 @@
 python -m stock_news_analysis.algo_trading.auth_upstox
 """
 
-import requests
 import webbrowser
 import json
 import os
 from urllib.parse import urlencode
+from utility.http_client import get_session, default_timeout
 
 # ---------- CONFIG SECTION ----------
 client_id = '8c5684de-a579-4126-b7b6-ebd86a450c30'
@@ -48,7 +48,7 @@ def get_access_token(auth_code):
         'Content-Type': 'application/x-www-form-urlencoded',
         'Accept': 'application/json'
     }
-    response = requests.post(url, data=payload, headers=headers)
+    response = get_session().post(url, data=payload, headers=headers, timeout=default_timeout())
     if response.status_code == 200:
         data = response.json()
         save_token(data)
@@ -2,13 +2,13 @@
 python -m stock_news_analysis.algo_trading.download_instrument
 """
 
-import requests
 import pandas as pd
 import json
+from utility.http_client import fetch
 
 # Step 1: Download instruments
 url = "https://api.upstox.com/v2/instruments"
-response = requests.get(url)
+response = fetch(url)
 
 if response.status_code == 200:
     # Step 2: Parse and filter only NSE EQ (equity) instruments
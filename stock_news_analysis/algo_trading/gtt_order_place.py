@@ -3,8 +3,8 @@ python -m stock_news_analysis.algo_trading.gtt_order_place
 """
 
 import json
-import requests
 import pandas as pd
+from utility.http_client import fetch, get_session, default_timeout
 from datetime import datetime, time
 
 # Load instruments from JSON
@@ -51,7 +51,7 @@ def get_ltp(symbol, exchange="NSE", interval="1d"):
             "Authorization": f"Bearer {access_token}"
         }
 
-        response = requests.get(url, headers=headers, params=params)
+        response = fetch(url, headers=headers, params=params)
         if response.status_code == 200:
             data = response.json()
             if "data" in data:
@@ -115,7 +115,7 @@ def place_gtt_order_by_symbol(symbol, entry_price, target_price, stoploss_price,
         ]
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_session().post(url, headers=headers, json=payload, timeout=default_timeout())
 
     if response.status_code == 200:
         print("✅ GTT order placed successfully!")
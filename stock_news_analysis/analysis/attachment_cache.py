@@ -0,0 +1,257 @@
+"""
+python -m stock_news_analysis.analysis.attachment_cache
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from utility.http_client import fetch, EXCHANGE_HEADERS
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('attachment_cache')
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+ATTACHMENT_CACHE_DIR = Path(os.environ.get("ATTACHMENT_CACHE_DIR", CACHE_DIR / "attachments"))
+ATTACHMENT_CACHE_MAX_BYTES = int(os.environ.get("ATTACHMENT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+ATTACHMENT_CACHE_ENABLED = os.environ.get("ATTACHMENT_CACHE", "1") != "0"
+# Bodies are streamed in chunks of this size so a bandwidth cap applies while they download
+ATTACHMENT_CHUNK_BYTES = 64 * 1024
+# Only real attachments are cached; HTML/XHTML block or error pages never are
+ATTACHMENT_MIME_TYPES = {"application/pdf", "application/x-pdf", "application/xml", "text/xml"}
+
+class AttachmentCache:
+    """
+    Local blob store for fetched PDFs/XMLs.
+
+    URLs are indexed in SQLite with their ETag / Last-Modified headers. Bodies are stored
+    once per sha256 content hash, so a re-disseminated PDF under a new URL costs no extra space.
+    Once the stored bytes exceed `max_bytes`, the least recently used URLs are evicted, and
+    blobs no URL references any more are deleted.
+    """
+
+    def __init__(self, root=ATTACHMENT_CACHE_DIR, max_bytes=ATTACHMENT_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS attachments ("
+            "url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, content_type TEXT, etag TEXT, "
+            "last_modified TEXT, size INTEGER NOT NULL, fetched_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_attachments_last_access ON attachments(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_attachments_hash ON attachments(content_hash)")
+        self._conn.commit()
+
+    def _blob_path(self, content_hash):
+        return self.blob_dir / content_hash[:2] / content_hash
+
+    def _lookup(self, url, read=True):
+        """
+        Returns the cached entry for url, with its bytes under "content" when `read` is set.
+
+        The row lookup, blob read and last_access update happen under the same lock and
+        transaction as eviction, so a blob can't be deleted between finding and reading it.
+        A blob removed by another process in the meantime is treated as a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, content_type, etag, last_modified FROM attachments WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            content_hash, content_type, etag, last_modified = row
+            entry = {"hash": content_hash, "content_type": content_type, "etag": etag,
+                     "last_modified": last_modified}
+            path = self._blob_path(content_hash)
+            if not read:
+                return entry if path.exists() else None
+            try:
+                entry["content"] = path.read_bytes()
+            except FileNotFoundError:
+                return None
+            self._conn.execute("UPDATE attachments SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        return entry
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _store(self, url, content, content_type, etag, last_modified):
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(content_hash)
+
+        now = time.time()
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, path)
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO attachments "
+                    "(url, content_hash, content_type, etag, last_modified, size, fetched_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, content_hash, content_type, etag, last_modified, len(content), now, now),
+                )
+                orphans = self._evict()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            # Blobs go only once no committed row points at them any more
+            for orphan in orphans:
+                self._blob_path(orphan).unlink(missing_ok=True)
+
+    def _evict(self):
+        """Deletes least recently used rows until under max_bytes; returns the now-unreferenced blob hashes."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT content_hash, MAX(size) AS size FROM attachments GROUP BY content_hash)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return []
+
+        orphans = []
+        for url, content_hash, size in self._conn.execute(
+            "SELECT url, content_hash, size FROM attachments ORDER BY last_access ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM attachments WHERE url = ?", (url,))
+            still_used = self._conn.execute(
+                "SELECT 1 FROM attachments WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            if not still_used:
+                orphans.append(content_hash)
+                total -= size
+            if total <= self.max_bytes:
+                break
+        return orphans
+
+    def fetch(self, url, revalidate=False, on_chunk=None):
+        """
+        Returns (content, content_type) for `url`, from the cache when possible.
+
+        Exchange attachments are immutable, so a cached copy is served without touching the
+        network. With `revalidate=True` a conditional GET (If-None-Match / If-Modified-Since)
+        is sent first, and a 304 still serves the cached bytes. `on_chunk(nbytes)` is called
+        for every chunk read from the network, e.g. to throttle the download.
+
+        Raises:
+            requests.HTTPError: If the server answers with an error status.
+        """
+        cached = self._lookup(url, read=not revalidate)
+        if cached and not revalidate:
+            self._count(hits=1, bytes_saved=len(cached["content"]))
+            return cached["content"], cached["content_type"]
+
+        headers = dict(EXCHANGE_HEADERS)
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with fetch(url, headers=headers, stream=True) as response:
+            if cached and response.status_code == 304:
+                current = self._lookup(url)
+                if current is not None:
+                    self._count(hits=1, revalidated=1, bytes_saved=len(current["content"]))
+                    return current["content"], current["content_type"]
+                not_modified = True
+            else:
+                not_modified = False
+                response.raise_for_status()
+                content = read_body(response, on_chunk)
+        if not_modified:
+            # Evicted while revalidating: fetch the body unconditionally
+            return self.fetch(url, on_chunk=on_chunk)
+        self._count(misses=1)
+        content_type = response.headers.get("Content-Type")
+        # Only keep real attachments; an HTML block/error page must not be cached forever
+        if is_attachment_type(content_type):
+            self._store(url, content, content_type,
+                        response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return content, content_type
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            entries, stored = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM attachments").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "entries": entries,
+            "stored_bytes": stored,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            f"🗃️ Attachment cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"(hit rate {stats['hit_rate']:.1%}), {stats['bytes_saved'] / 1024 ** 2:.1f} MB saved, "
+            f"{stats['entries']} entries"
+        )
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_attachment_cache():
+    """Returns the process-wide AttachmentCache, or None when disabled via ATTACHMENT_CACHE=0."""
+    global _cache
+    if not ATTACHMENT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = AttachmentCache()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Attachment cache unavailable, fetching directly: {e}")
+                return None
+        return _cache
+
+def is_attachment_type(content_type):
+    """True for PDF/XML Content-Types, ignoring parameters such as charset."""
+    if not content_type:
+        return False
+    return content_type.split(";", 1)[0].strip().lower() in ATTACHMENT_MIME_TYPES
+
+def read_body(response, on_chunk=None):
+    """Reads a streamed response body chunk by chunk, reporting each chunk's size to on_chunk."""
+    chunks = []
+    for chunk in response.iter_content(ATTACHMENT_CHUNK_BYTES):
+        if on_chunk:
+            on_chunk(len(chunk))
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def fetch_attachment(url, revalidate=False, on_chunk=None):
+    """Returns (content, content_type) for an attachment URL, consulting the blob cache first."""
+    cache = get_attachment_cache()
+    if cache:
+        return cache.fetch(url, revalidate=revalidate, on_chunk=on_chunk)
+    with fetch(url, headers=EXCHANGE_HEADERS, stream=True) as response:
+        response.raise_for_status()
+        return read_body(response, on_chunk), response.headers.get("Content-Type")
+
+if __name__ == "__main__":
+    cache = get_attachment_cache()
+    if cache:
+        cache.log_stats()
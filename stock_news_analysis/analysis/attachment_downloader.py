@@ -0,0 +1,142 @@
+"""
+python -m stock_news_analysis.analysis.attachment_downloader
+"""
+
+import os
+import time
+import queue
+import asyncio
+import threading
+from collections import namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from stock_news_analysis.analysis.attachment_cache import fetch_attachment
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('attachment_downloader')
+
+DOWNLOAD_MAX_CONCURRENCY = int(os.environ.get("DOWNLOAD_MAX_CONCURRENCY", 32))
+DOWNLOAD_PER_HOST_CONCURRENCY = int(os.environ.get("DOWNLOAD_PER_HOST_CONCURRENCY", 8))
+# 0 = no bandwidth cap
+DOWNLOAD_MAX_BYTES_PER_SEC = int(os.environ.get("DOWNLOAD_MAX_BYTES_PER_SEC", 0))
+
+DownloadResult = namedtuple("DownloadResult", ["url", "content", "content_type", "error", "seconds"])
+
+class _BandwidthLimiter:
+    """
+    Token bucket shared by every download thread. Each streamed chunk is charged as it is read
+    and its thread sleeps off any deficit, so the combined rate stays under the cap while
+    transfers are in flight, not just on average.
+    """
+
+    def __init__(self, bytes_per_sec):
+        self.bytes_per_sec = bytes_per_sec
+        self._allowance = float(bytes_per_sec)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes):
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.bytes_per_sec, self._allowance + (now - self._last) * self.bytes_per_sec)
+            self._last = now
+            self._allowance -= nbytes
+            wait = -self._allowance / self.bytes_per_sec if self._allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+def _fetch_blocking(url, limiter=None):
+    start = time.perf_counter()
+    try:
+        content, content_type = fetch_attachment(url, on_chunk=limiter.consume if limiter else None)
+        return DownloadResult(url, content, content_type, None, time.perf_counter() - start)
+    except Exception as e:
+        return DownloadResult(url, None, None, e, time.perf_counter() - start)
+
+async def download_attachments_async(urls, on_result=None, max_concurrency=DOWNLOAD_MAX_CONCURRENCY,
+                                     per_host_concurrency=DOWNLOAD_PER_HOST_CONCURRENCY,
+                                     max_bytes_per_sec=DOWNLOAD_MAX_BYTES_PER_SEC):
+    """
+    Downloads every URL concurrently and returns {url: DownloadResult}.
+
+    Parameters:
+        urls (iterable[str]): Attachment URLs; duplicates are fetched once.
+        on_result (callable): Called with each DownloadResult as soon as it completes, so the
+            extraction stage can start on finished files while the rest are still downloading.
+            It runs off the event loop and may block; the download keeps its concurrency slot
+            until it returns, so a slow consumer holds back new downloads.
+        max_concurrency (int): Global cap on in-flight requests.
+        per_host_concurrency (int): Cap on in-flight requests to any one host.
+        max_bytes_per_sec (int): Global bandwidth cap; 0 disables it.
+
+    Returns:
+        dict[str, DownloadResult]: Failed downloads carry the exception in `error` instead of raising.
+        With `on_result`, bodies belong to the callback and `content` is None here.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
+
+    loop = asyncio.get_running_loop()
+    global_sem = asyncio.Semaphore(max_concurrency)
+    host_sems = defaultdict(lambda: asyncio.Semaphore(per_host_concurrency))
+    limiter = _BandwidthLimiter(max_bytes_per_sec) if max_bytes_per_sec > 0 else None
+
+    # requests is blocking, so each transfer (or cache read) runs on a worker thread; bodies
+    # are streamed there and throttled chunk by chunk, cache hits are not throttled
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="download") as executor:
+        async def download_one(url):
+            async with global_sem:
+                async with host_sems[urlparse(url).netloc]:
+                    result = await loop.run_in_executor(executor, _fetch_blocking, url, limiter)
+                if not on_result:
+                    return result
+                try:
+                    await loop.run_in_executor(None, on_result, result)
+                except Exception as e:
+                    logger.error(f"❌ Download hand-off failed for {url}: {e}")
+            return result._replace(content=None)
+
+        results = await asyncio.gather(*(download_one(url) for url in urls))
+
+    return {result.url: result for result in results}
+
+def download_attachments(urls, on_result=None, **limits):
+    """Synchronous wrapper around download_attachments_async for callers outside an event loop."""
+    start = time.time()
+    results = asyncio.run(download_attachments_async(urls, on_result=on_result, **limits))
+    failed = sum(1 for result in results.values() if result.error)
+    logger.info(f"⬇️ Downloaded {len(results) - failed}/{len(results)} attachments in {time.time() - start:.2f} seconds")
+    return results
+
+def iter_downloads(urls, maxsize=64, **limits):
+    """
+    Yields each DownloadResult as soon as it completes.
+
+    The downloads run on a background event loop and feed a bounded queue. A full queue holds
+    back new downloads, so at most `maxsize` plus DOWNLOAD_MAX_CONCURRENCY bodies are in memory.
+    """
+    results = queue.Queue(maxsize=maxsize)
+    done = object()
+
+    def run():
+        try:
+            download_attachments(urls, on_result=results.put, **limits)
+        except Exception as e:
+            logger.error(f"❌ Attachment downloads failed: {e}")
+        finally:
+            results.put(done)
+
+    threading.Thread(target=run, name="download-loop", daemon=True).start()
+    while True:
+        result = results.get()
+        if result is done:
+            return
+        yield result
+
+if __name__ == "__main__":
+    from stock_news_analysis.analysis.read_latest_csv import load_latest_data
+
+    df = load_latest_data()
+    if df is not None:
+        download_attachments(df["ATTACHMENT"].dropna().tolist())
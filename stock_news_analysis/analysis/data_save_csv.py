@@ -1,53 +1,387 @@
+import io
+import os
+import csv
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import date
 from pathlib import Path
+from stock_news_analysis.analysis.processed_index import (
+    get_processed_index, keys_for_rows, keys_for_frame, SENTIMENT, CHART, OUTPUT_KEY_COLUMNS
+)
 from utility.my_automation_logger import get_logger
 
 logger = get_logger('Saved_csv_of_after_sentiment_analysis')
 
-today_str = date.today().isoformat()
-CSV_FILE = Path(__file__).resolve().parent.parent / "output" / f"process_sentiment_anaylsis_{today_str}.csv"
-CSV_FILE_CHART_IND = Path(__file__).resolve().parent.parent / "output" / "chart_pattern_detect" / f"chart_pattern_{today_str}.csv"
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "output"
+SENTIMENT_COLUMNS = ["Company", "Headline", "Description", "Time", "pdf_link", "vader_score", "textblob_score", "bert_sentiment", "confidence", "final_sentiment"]
+CHECKPOINT_ROWS = int(os.environ.get("CHECKPOINT_ROWS", 20))
+CHECKPOINT_SECONDS = float(os.environ.get("CHECKPOINT_SECONDS", 30))
 
+# Parquet is the primary store: output/parquet/<dataset>/date=<YYYY-MM-DD>/part-*.parquet
+PARQUET_DIR = Path(__file__).resolve().parent.parent / "output" / "parquet"
+SENTIMENT_DATASET = "sentiment"
+CHART_DATASET = "chart_pattern"
+BSE_DATASET = "bse_announcements"
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Manifest of every dataset's partitions; loaders resolve "latest" from it
+CATALOG_FILE = BASE_DIR / "output" / "catalog.json"
+SCHEMA_VERSION = 1
+# Daily CSVs are only written when OUTPUT_CSV=1
+OUTPUT_CSV = os.environ.get("OUTPUT_CSV", "0") == "1"
+TIME_FORMAT = "%d-%b-%Y %H:%M:%S"
 
-def save_to_csv_after_sentiment(new_data):
-    CSV_FILE.parent.mkdir(parents=True, exist_ok=True)
-    columns = ["Company", "Headline", "Description", "Time", "pdf_link", "vader_score", "textblob_score", "bert_sentiment", "confidence", "final_sentiment"]
+_category = pa.dictionary(pa.int32(), pa.string())
+SENTIMENT_SCHEMA = pa.schema([
+    ("Company", _category),
+    ("Headline", pa.string()),
+    ("Description", pa.string()),
+    ("Time", pa.timestamp("s")),
+    ("pdf_link", pa.string()),
+    ("vader_score", pa.float64()),
+    ("textblob_score", pa.float64()),
+    ("bert_sentiment", pa.float64()),
+    ("confidence", pa.float64()),
+    ("final_sentiment", _category),
+])
+CHART_SCHEMA = SENTIMENT_SCHEMA.append(pa.field("Chart_Pattern", pa.string())).append(pa.field("Tech_Indicator", pa.string()))
+CHART_KEYS = ["Company", "Headline", "Chart_Pattern", "Tech_Indicator"]
+CHART_COMPACT_PARTS = int(os.environ.get("CHART_COMPACT_PARTS", 8))
+SENTIMENT_COMPACT_PARTS = int(os.environ.get("SENTIMENT_COMPACT_PARTS", 8))
+SCHEMAS = {SENTIMENT_DATASET: SENTIMENT_SCHEMA, CHART_DATASET: CHART_SCHEMA, BSE_DATASET: SENTIMENT_SCHEMA}
 
-    if CSV_FILE.exists() and CSV_FILE.stat().st_size > 0:
-        try:
-            old_df = pd.read_csv(CSV_FILE)
-            old_links = set(old_df["pdf_link"])
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to read existing CSV: {e}")
-            old_links = set()
-            old_df = pd.DataFrame(columns=columns)
-
-        new_entries = [row for row in new_data if row["pdf_link"] not in old_links]
-        if new_entries:
-            pd.DataFrame(new_entries).to_csv(CSV_FILE, mode='a', header=False, index=False)
-            logger.info(f"✅ Appended {len(new_entries)} new rows.")
+
+def current_day():
+    """Today's partition key. Resolved on every write, so a long-running watch() rolls over at midnight."""
+    return date.today().isoformat()
+
+def sentiment_csv_path(day=None):
+    return OUTPUT_DIR / f"process_sentiment_anaylsis_{day or current_day()}.csv"
+
+def chart_csv_path(day=None):
+    return OUTPUT_DIR / "chart_pattern_detect" / f"chart_pattern_{day or current_day()}.csv"
+
+def parse_times(values):
+    """Parses announcement times ("06-Jun-2025 10:47:07"), falling back to a generic day-first parse."""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, format=TIME_FORMAT, errors="coerce")
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing], errors="coerce", dayfirst=True)
+    return parsed
+
+def to_arrow_table(df, schema):
+    """Converts df to a table with exactly `schema`'s columns and types; missing columns become nulls."""
+    arrays = []
+    for field in schema:
+        values = df[field.name] if field.name in df else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_timestamp(field.type):
+            array = pa.array(parse_times(values), from_pandas=True).cast(field.type, safe=False)
+        elif pa.types.is_floating(field.type):
+            array = pa.array(pd.to_numeric(values, errors="coerce"), type=field.type, from_pandas=True)
         else:
-            logger.info("ℹ️ No new announcements.")
+            strings = [None if pd.isna(v) else str(v) for v in values]
+            array = pa.array(strings, type=pa.string())
+            if pa.types.is_dictionary(field.type):
+                array = array.dictionary_encode()
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+@contextmanager
+def _catalog_lock(timeout=10, stale_after=30):
+    """Cross-process lock around catalog read-modify-write, via an O_EXCL lock file."""
+    lock_path = CATALOG_FILE.with_suffix(".lock")
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > stale_after:
+                    lock_path.unlink(missing_ok=True)  # left behind by a crashed writer
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Catalog lock {lock_path} is held")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        lock_path.unlink(missing_ok=True)
+
+def _update_catalog(dataset, day, entry, fmt):
+    """Records one partition's entry in the catalog, which is rewritten atomically."""
+    CATALOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with _catalog_lock():
+            try:
+                catalog = json.loads(CATALOG_FILE.read_text())
+            except (FileNotFoundError, ValueError):
+                catalog = {"datasets": {}}
+            info = catalog["datasets"].setdefault(dataset, {"partitions": {}})
+            info["partitions"][day] = entry
+            info.update(format=fmt, schema_version=SCHEMA_VERSION, latest=max(info["partitions"]),
+                        last_modified=entry["last_modified"])
+            catalog["last_modified"] = entry["last_modified"]
+
+            tmp_path = CATALOG_FILE.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(catalog, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CATALOG_FILE)
+    except Exception as e:
+        # The data is already safely written; loaders fall back to scanning directories
+        logger.warning(f"⚠️ Failed to update catalog for {dataset}/{day}: {e}")
+
+def record_partition(dataset, day=None):
+    """Catalogs a Parquet partition: part count, bytes and rows (read from the file footers only)."""
+    day = day or current_day()
+    parts = sorted(partition_dir(dataset, day).glob("part-*.parquet"))
+    _update_catalog(dataset, day, {
+        "files": len(parts),
+        "rows": sum(pq.read_metadata(part).num_rows for part in parts),
+        "bytes": sum(part.stat().st_size for part in parts),
+        "last_modified": time.time(),
+    }, fmt="parquet")
+
+def register_file(dataset, path, day=None):
+    """Catalogs a single-file partition, e.g. the downloaded NSE announcement CSV."""
+    day = day or current_day()
+    path = Path(path).resolve()
+    # Relative to the package so the catalog survives moving the checkout; absolute otherwise
+    stored = path.relative_to(BASE_DIR) if path.is_relative_to(BASE_DIR) else path
+    _update_catalog(dataset, day, {
+        "path": stored.as_posix(),
+        "bytes": path.stat().st_size,
+        "last_modified": time.time(),
+    }, fmt=path.suffix.lstrip("."))
+
+def partition_dir(dataset, day=None):
+    return PARQUET_DIR / dataset / f"date={day or current_day()}"
+
+def _write_table_atomic(table, path):
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_parquet_part(dataset, df, day=None):
+    """Writes df as a new part file of the dataset's `day` partition (default today) and returns its path."""
+    day = day or current_day()
+    directory = partition_dir(dataset, day)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Nanosecond names sort in write order, which is what "last row wins" relies on
+    path = directory / f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+    _write_table_atomic(to_arrow_table(df, SCHEMAS[dataset]), path)
+    record_partition(dataset, day)
+    return path
+
+def compact_partition(dataset, day=None, unique_keys=None, min_parts=2):
+    """
+    Merges a partition's part files into one, optionally keeping only the last row per `unique_keys`.
+
+    Nothing happens while the partition has fewer than `min_parts` parts. The merged file
+    takes the newest merged part's place in the sort order, so parts appended meanwhile still
+    win, and it is in place before the old parts are removed, so a reader never sees rows go
+    missing. Returns True if the partition was compacted.
+    """
+    day = day or current_day()
+    directory = partition_dir(dataset, day)
+    parts = sorted(directory.glob("part-*.parquet"))
+    if len(parts) < max(min_parts, 2):
+        return False
+    df = pa.concat_tables([pq.read_table(part) for part in parts]).to_pandas()
+    if unique_keys:
+        df = df.drop_duplicates(subset=unique_keys, keep="last")
+    merged = directory / f"{parts[-1].stem}-c.parquet"
+    _write_table_atomic(to_arrow_table(df, SCHEMAS[dataset]), merged)
+    for part in parts:
+        part.unlink(missing_ok=True)
+    record_partition(dataset, day)
+    logger.info(f"🗜️ Compacted {len(parts)} parts of {dataset}/{directory.name} into {len(df)} rows")
+    return True
+
+class CheckpointWriter:
+    """
+    Append-only writer for the sentiment output that persists rows as they are produced.
+
+    Rows are buffered and written every `flush_rows` rows or `flush_seconds` seconds as a new
+    Parquet part (plus a CSV append when OUTPUT_CSV=1). Every write is fsync'ed, so a crash or
+    Ctrl-C loses at most one small buffer. On close the day's parts are merged only once there
+    are SENTIMENT_COMPACT_PARTS of them, so a frequent scheduler does not rewrite the whole day
+    on every run. The output doubles as the checkpoint: flushed rows are recorded in the
+    processed index that load_new_data_to_process consults, so the next run resumes where this
+    one stopped. Rows already in the processed index are skipped.
+    """
+
+    def __init__(self, path=None, flush_rows=CHECKPOINT_ROWS, flush_seconds=CHECKPOINT_SECONDS):
+        # None: the CSV of the day each flush lands in
+        self._path = Path(path) if path else None
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self._days = set()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        if OUTPUT_CSV:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._repair_tail()
+        self._index = get_processed_index()
+
+    @property
+    def path(self):
+        return self._path or sentiment_csv_path()
+
+    def _repair_tail(self):
+        """
+        Drops a half-written last record left behind by a crash mid-append.
+
+        The file is re-parsed with the csv module so a newline inside a quoted multi-line field
+        (announcement subjects and details often have them) is not mistaken for a record end.
+        """
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with open(self.path, "rb") as f:
+            # surrogateescape keeps a multi-byte character cut in half by the crash byte-exact
+            text = f.read().decode("utf-8", errors="surrogateescape")
+
+        position = {"bytes": 0, "terminated": False}
+        complete = 0
+
+        def lines():
+            for line in io.StringIO(text, newline=""):
+                position["bytes"] += len(line.encode("utf-8", errors="surrogateescape"))
+                position["terminated"] = line.endswith(("\n", "\r"))
+                yield line
+
+        try:
+            for _ in csv.reader(lines(), strict=True):
+                # A record is complete once its terminating newline has been read
+                if position["terminated"]:
+                    complete = position["bytes"]
+        except csv.Error:
+            pass  # unterminated quoted field: everything after the last complete record goes
+
+        size = self.path.stat().st_size
+        if complete == size:
+            return
+        with open(self.path, "rb+") as f:
+            f.truncate(complete)
+        logger.warning(f"⚠️ Dropped a partially written row from {self.path.name}")
+
+    def add(self, row):
+        self.add_many([row])
+
+    def add_many(self, rows):
+        rows = list(rows)
+        keys = keys_for_rows(rows)
+        seen = self._index.contains_many(SENTIMENT, keys)
+        with self._lock:
+            self._buffer.extend(row for row, key in zip(rows, keys) if key not in seen)
+            due = len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds
+            if due:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        day = current_day()
+        frame = pd.DataFrame(self._buffer, columns=SENTIMENT_COLUMNS)
+        write_parquet_part(SENTIMENT_DATASET, frame, day)
+        self._days.add(day)
+        if OUTPUT_CSV:
+            path = self._path or sentiment_csv_path(day)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_header = not path.exists() or path.stat().st_size == 0
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                frame.to_csv(f, header=write_header, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            register_file("sentiment_csv", path, day)
+        # Only rows that reached the disk are marked processed
+        self._index.add_many(SENTIMENT, keys_for_rows(self._buffer))
+        self.written += len(self._buffer)
+        logger.info(f"💾 Checkpointed {len(self._buffer)} rows to {SENTIMENT_DATASET}/{day} ({self.written} this run)")
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        for day in sorted(self._days):
+            compact_partition(SENTIMENT_DATASET, day, min_parts=SENTIMENT_COMPACT_PARTS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def save_to_csv_after_sentiment(new_data):
+    with CheckpointWriter(flush_rows=max(len(new_data), 1)) as writer:
+        writer.add_many(new_data)
+    if writer.written:
+        logger.info(f"✅ Saved {writer.written} new rows to {SENTIMENT_DATASET}/{current_day()}")
     else:
-        pd.DataFrame(new_data, columns=columns).to_csv(CSV_FILE, index=False)
-        logger.info(f"✅ Created new CSV with {len(new_data)} entries: {CSV_FILE.name}")
+        logger.info("ℹ️ No new announcements.")
+
+def _compact_csv(path, unique_keys):
+    """Rewrites a CSV keeping the last row per key; readers see either the old or the new file."""
+    df = pd.read_csv(path).drop_duplicates(subset=unique_keys, keep="last")
+    tmp_path = path.with_suffix(".csv.tmp")
+    df.to_csv(tmp_path, index=False)
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
 def save_to_csv_chart_ind(df):
-    CSV_FILE_CHART_IND.parent.mkdir(parents=True, exist_ok=True)
+    """
+    Upserts chart pattern rows keyed on CHART_KEYS.
+
+    Each run only appends its own rows as a new part, so its cost tracks the new rows rather
+    than the size of the day. A row whose key was saved earlier is an update: the newer part
+    wins on read, and once the partition holds CHART_COMPACT_PARTS parts they are merged into
+    one with the superseded rows dropped.
+    """
+    if df is None or df.empty:
+        logger.info("ℹ️ No chart pattern rows to save.")
+        return
 
     try:
-        if CSV_FILE_CHART_IND.exists() and CSV_FILE_CHART_IND.stat().st_size > 0:
-            df_existing = pd.read_csv(CSV_FILE_CHART_IND)
-            df_combined = pd.concat([df_existing, df], ignore_index=True)
-            df_combined.drop_duplicates(subset=["Company", "Headline", "Chart_Pattern", "Tech_Indicator"], keep="last", inplace=True)
-            df_combined.to_csv(CSV_FILE_CHART_IND, index=False)
-            logger.info(f"✅ Updated existing CSV with {len(df)} new/updated rows: {CSV_FILE_CHART_IND.name}")
-        else:
-            df.to_csv(CSV_FILE_CHART_IND, index=False)
-            logger.info(f"✅ Created new CSV with {len(df)} rows: {CSV_FILE_CHART_IND.name}")
+        day = current_day()
+        csv_path = chart_csv_path(day)
+        write_parquet_part(CHART_DATASET, df, day)
+        logger.info(f"✅ Saved {len(df)} new/updated chart rows to {CHART_DATASET}/{day}")
+
+        if OUTPUT_CSV:
+            csv_path.parent.mkdir(parents=True, exist_ok=True)
+            write_header = not csv_path.exists() or csv_path.stat().st_size == 0
+            with open(csv_path, "a", newline="", encoding="utf-8") as f:
+                df.to_csv(f, header=write_header, index=False)
+            register_file("chart_pattern_csv", csv_path, day)
+
+        if compact_partition(CHART_DATASET, day, unique_keys=CHART_KEYS, min_parts=CHART_COMPACT_PARTS) and OUTPUT_CSV:
+            _compact_csv(csv_path, CHART_KEYS)
+        get_processed_index().add_many(CHART, keys_for_frame(df, OUTPUT_KEY_COLUMNS))
     except Exception as e:
-        logger.error(f"❌ Error saving CSV: {e}")
+        logger.error(f"❌ Error saving chart pattern data: {e}")
 
 if __name__ == "__main__":
     data = ''
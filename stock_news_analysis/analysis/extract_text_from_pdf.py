@@ -5,19 +5,19 @@ python -m stock_news_analysis.analysis.extract_text_from_pdf
 import re
 import requests
 import fitz  # PyMuPDF
-import io
 import xml.etree.ElementTree as ET
-import requests
-from transformers import pipeline
-
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+from utility.http_client import fetch, EXCHANGE_HEADERS
+from stock_news_analysis.analysis.attachment_cache import fetch_attachment
 
-def extract_text_from_bse_pdf(url: str) -> str:
+def extract_text_from_bse_pdf(url: str, max_chars: int = None, max_pages: int = None, start_offset: int = 0) -> str:
     """
     Extracts text from a BSE announcement PDF URL.
 
     Parameters:
         url (str): The full BSE announcement PDF URL.
+        max_chars (int): Stop parsing once this many characters past `start_offset` are collected.
+        max_pages (int): Never parse more than this many pages.
+        start_offset (int): Characters to skip from the start of the document (e.g. letterhead).
 
     Returns:
         str: Extracted text content from the PDF.
@@ -25,35 +25,71 @@ def extract_text_from_bse_pdf(url: str) -> str:
     Raises:
         ValueError: If the response is not a PDF.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-        "Referer": "https://www.nseindia.com/"
-    }
+    content, content_type = fetch_attachment(url)
+    return extract_text_from_pdf_bytes(content, content_type, max_chars, max_pages, start_offset)
 
-    response = requests.get(url, headers=headers)
+def extract_text_from_pdf_bytes(content: bytes, content_type: str = "application/pdf", max_chars: int = None,
+                                max_pages: int = None, start_offset: int = 0) -> str:
+    """
+    Extracts text from PDF bytes that were already downloaded.
 
-    if response.headers.get("Content-Type") != "application/pdf":
-        raise ValueError(f"Expected a PDF, but got: {response.headers.get('Content-Type')}")
+    Parameters:
+        content (bytes): The raw PDF body.
+        content_type (str): The Content-Type the server sent with it.
+        max_chars, max_pages, start_offset: Text budget, see extract_pdf_text.
 
-    pdf_file = fitz.open(stream=io.BytesIO(response.content), filetype="pdf")
+    Returns:
+        str: Extracted text content from the PDF.
 
-    full_text = ""
-    for page in pdf_file:
-        full_text += page.get_text()
+    Raises:
+        ValueError: If the content type is not a PDF.
+    """
+    if content_type != "application/pdf":
+        raise ValueError(f"Expected a PDF, but got: {content_type}")
 
-    return full_text
+    return extract_pdf_text(content, max_chars=max_chars, max_pages=max_pages, start_offset=start_offset)
+
+def extract_pdf_text(content: bytes, max_chars: int = None, max_pages: int = None, start_offset: int = 0,
+                     separator: str = "") -> str:
+    """
+    Extracts PDF text page by page and stops as soon as the budget is met.
+
+    Pages are collected in a list and joined once, and the document is closed as soon as
+    parsing stops. A 200-page annual report with a 16k character budget only parses the
+    first few pages.
+
+    Parameters:
+        content (bytes): The raw PDF body.
+        max_chars (int): Characters wanted after `start_offset`; None reads every page.
+        max_pages (int): Hard cap on pages parsed; None means no cap.
+        start_offset (int): Characters to skip from the start of the document.
+        separator (str): Inserted between pages.
+
+    Returns:
+        str: At most `max_chars` characters of text starting at `start_offset`.
+    """
+    target = start_offset + max_chars if max_chars is not None else None
+    parts = []
+    collected = 0
+
+    with fitz.open(stream=content, filetype="pdf") as pdf_file:
+        for page_number, page in enumerate(pdf_file):
+            if max_pages is not None and page_number >= max_pages:
+                break
+            text = page.get_text()
+            parts.append(text)
+            collected += len(text) + len(separator)
+            if target is not None and collected >= target:
+                break
+
+    return separator.join(parts)[start_offset:target]
 
 def extract_text_from_nse_xml(url: str) -> str:
     # ✅ Auto-correct common domain typos using regex
     url = re.sub(r"nsearchives\.nse.*?dia\.co+m", "nsearchives.nseindia.com", url)
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-        "Referer": "https://www.nseindia.com/"
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch(url, headers=EXCHANGE_HEADERS)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise ValueError(f"❌ Failed to fetch the file: {e}")
@@ -61,8 +97,7 @@ def extract_text_from_nse_xml(url: str) -> str:
     content_type = response.headers.get("Content-Type", "").lower()
 
     if "pdf" in content_type:
-        pdf_file = fitz.open(stream=io.BytesIO(response.content), filetype="pdf")
-        return "\n".join([page.get_text() for page in pdf_file])
+        return extract_pdf_text(response.content, separator="\n")
 
     elif "xml" in content_type:
         try:
@@ -0,0 +1,195 @@
+"""
+python -m stock_news_analysis.analysis.inference_backend --backend onnx
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+import torch
+from pathlib import Path
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('inference_backend')
+
+# torch | torch-int8 | onnx
+BACKENDS = ("torch", "torch-int8", "onnx")
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "torch")
+ONNX_DIR = Path(__file__).resolve().parent.parent / "cache" / "onnx"
+ONNX_OPSET = int(os.environ.get("SENTIMENT_ONNX_OPSET", 14))
+# Everything that shapes the exported graph; a change to any of these exports a new file
+ONNX_EXPORT_SETTINGS = {
+    "opset": ONNX_OPSET,
+    "dynamic_axes": {"inputs": ["batch", "sequence"], "logits": ["batch"]},
+    "output": "logits",
+    "torch": torch.__version__,
+}
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class TorchRunner:
+    """Runs a PyTorch sequence classifier (fp32, or dynamically int8-quantized)."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def logits(self, inputs):
+        with torch.no_grad():
+            return self.model(**inputs).logits.numpy()
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids).logits
+
+class OnnxRunner:
+    """Runs an exported ONNX graph through ONNX Runtime on CPU, exporting it on first use."""
+
+    def __init__(self, model_name, tokenizer, model):
+        import onnxruntime as ort
+
+        path = self.export_path(model_name)
+        if not path.exists():
+            self._export(tokenizer, model, path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @staticmethod
+    def export_path(model_name, settings=ONNX_EXPORT_SETTINGS):
+        """Export file for a model under the given export settings."""
+        digest = hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+        return ONNX_DIR / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)}-{digest}.onnx"
+
+    @staticmethod
+    def _export(tokenizer, model, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dummy = tokenizer(["onnx export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+        axes = ONNX_EXPORT_SETTINGS["dynamic_axes"]
+        dynamic_axes = {name: dict(enumerate(axes["inputs"])) for name in input_names}
+        dynamic_axes["logits"] = dict(enumerate(axes["logits"]))
+
+        logger.info(f"📤 Exporting ONNX graph to {path}")
+        # Export under a per-process name and move it into place, so workers that start cold
+        # together never open a half-written graph
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            torch.onnx.export(
+                _LogitsOnly(model).eval(),
+                tuple(dummy[name] for name in input_names),
+                str(tmp_path),
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_EXPORT_SETTINGS["opset"],
+            )
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def logits(self, inputs):
+        feeds = {name: inputs[name].numpy() for name in self.input_names}
+        return self.session.run(["logits"], feeds)[0]
+
+def build_runner(model_name, tokenizer, model, backend=SENTIMENT_BACKEND):
+    """
+    Wraps a loaded classifier in the requested CPU inference backend.
+
+    Parameters:
+        model_name (str): Hugging Face model id, used to name the ONNX export.
+        tokenizer: The model's tokenizer.
+        model: The fp32 PyTorch model.
+        backend (str): One of BACKENDS.
+
+    Returns:
+        A runner exposing logits(inputs) -> np.ndarray. The onnx backend falls back to
+        torch if ONNX Runtime is missing or the export fails.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend == "torch":
+        return TorchRunner(model)
+    if backend == "torch-int8":
+        return TorchRunner(torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8))
+    if backend == "onnx":
+        try:
+            return OnnxRunner(model_name, tokenizer, model)
+        except Exception as e:
+            # Never leave the model unscored: a missing onnxruntime or a failed export falls back to fp32
+            logger.error(f"❌ ONNX backend unavailable for {model_name}, falling back to torch: {e}")
+            return TorchRunner(model)
+    raise ValueError(f"Unknown sentiment backend '{backend}', expected one of {BACKENDS}")
+
+def check_parity(texts, backend, tolerance=0.05):
+    """
+    Compares a backend against the fp32 PyTorch path on the same texts.
+
+    Returns per-score max absolute difference plus final_sentiment label agreement.
+    The check passes when every score stays within `tolerance` and all labels match.
+    """
+    from stock_news_analysis.analysis.sentiment_analysis import EnhancedSentimentAnalyzer
+
+    reference = EnhancedSentimentAnalyzer(use_cache=False, backend="torch").analyze_batch(texts)
+    candidate = EnhancedSentimentAnalyzer(use_cache=False, backend=backend).analyze_batch(texts)
+
+    report = {"backend": backend, "tolerance": tolerance, "texts": len(texts)}
+    for key in ("transformer", "finbert", "combined"):
+        diffs = [abs(ref[0].get(key, 0) - cand[0].get(key, 0)) for ref, cand in zip(reference, candidate)]
+        report[f"max_abs_diff_{key}"] = max(diffs) if diffs else 0.0
+    matches = sum(ref[1] == cand[1] for ref, cand in zip(reference, candidate))
+    report["label_agreement"] = matches / len(texts) if texts else 1.0
+    report["passed"] = (
+        all(report[f"max_abs_diff_{key}"] <= tolerance for key in ("transformer", "finbert", "combined"))
+        and matches == len(texts)
+    )
+    return report
+
+def compare_throughput(texts, backends=BACKENDS, repeats=3):
+    """Returns texts/sec of the combined analyzer for each backend (best of `repeats`, after a warm-up)."""
+    from stock_news_analysis.analysis.sentiment_analysis import EnhancedSentimentAnalyzer
+
+    throughput = {}
+    for backend in backends:
+        analyzer = EnhancedSentimentAnalyzer(use_cache=False, backend=backend)
+        analyzer.analyze_batch(texts[:2])  # load + warm-up
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            analyzer.analyze_batch(texts)
+            best = min(best, time.perf_counter() - start)
+        throughput[backend] = round(len(texts) / best, 2) if best else None
+    return throughput
+
+def _sample_texts(limit):
+    import pandas as pd
+
+    output_dir = Path(__file__).resolve().parent.parent / "output"
+    texts = []
+    for csv_file in sorted(output_dir.glob("process_sentiment_anaylsis_*.csv")):
+        df = pd.read_csv(csv_file)
+        texts.extend(df["Description"].dropna().astype(str).tolist())
+    return texts[:limit]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity and throughput check for sentiment backends")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch-int8")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--limit", type=int, default=64)
+    args = parser.parse_args()
+
+    sample = _sample_texts(args.limit)
+    parity = check_parity(sample, args.backend, args.tolerance)
+    logger.info(f"{'✅' if parity['passed'] else '❌'} Parity vs fp32: {parity}")
+    logger.info(f"⚡ Throughput (texts/sec): {compare_throughput(sample, ('torch', args.backend))}")
@@ -0,0 +1,99 @@
+"""
+python -m stock_news_analysis.analysis.inference_pool
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('inference_pool')
+
+CPU_CORES = os.cpu_count() or 1
+# 0 = derive from core count; <= 1 means run inference in-process
+SENTIMENT_WORKERS = int(os.environ.get("SENTIMENT_WORKERS", 0))
+SENTIMENT_THREADS_PER_WORKER = int(os.environ.get("SENTIMENT_THREADS_PER_WORKER", 0))
+
+def default_layout(workers=SENTIMENT_WORKERS, threads_per_worker=SENTIMENT_THREADS_PER_WORKER, cores=CPU_CORES):
+    """
+    Splits the machine into worker processes × torch threads so that workers × threads = cores.
+
+    With nothing configured a 16-core box gets 4 workers of 4 threads each.
+    """
+    if workers <= 0:
+        workers = max(1, cores // 4)
+    if threads_per_worker <= 0:
+        threads_per_worker = max(1, cores // workers)
+    return workers, threads_per_worker
+
+_analyzer = None
+
+def _init_worker(threads, backend):
+    global _analyzer
+    import torch
+    from stock_news_analysis.analysis.sentiment_analysis import EnhancedSentimentAnalyzer
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _analyzer = EnhancedSentimentAnalyzer(backend=backend)
+    # Load every model once per worker, before the first job arrives
+    for model in ("vader", "bertweet_tokenizer", "bertweet_runner", "finbert_tokenizer", "finbert_runner"):
+        getattr(_analyzer, model)
+
+def _analyze_batch(texts):
+    return _analyzer.analyze_batch(texts)
+
+class InferencePool:
+    """
+    A pool of worker processes, each holding its own copy of the sentiment models.
+
+    Jobs go to the workers through the executor's call queue, and results come back in
+    submission order. Each worker pins torch to `threads_per_worker` intra-op threads so the
+    pool never oversubscribes the cores.
+    """
+
+    def __init__(self, workers=None, threads_per_worker=None, chunk_size=32, backend=None):
+        from stock_news_analysis.analysis.inference_backend import SENTIMENT_BACKEND
+
+        self.workers, self.threads_per_worker = default_layout(
+            workers if workers is not None else SENTIMENT_WORKERS,
+            threads_per_worker if threads_per_worker is not None else SENTIMENT_THREADS_PER_WORKER,
+        )
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, backend or SENTIMENT_BACKEND),
+        )
+        logger.info(f"🧵 Started inference pool: {self.workers} workers × {self.threads_per_worker} torch threads")
+
+    def submit(self, texts):
+        """Queues one batch of texts and returns a Future of its analyze_batch results."""
+        return self._executor.submit(_analyze_batch, list(texts))
+
+    def analyze_batch(self, texts):
+        """Splits texts into chunks, scores them across all workers and returns results in input order."""
+        texts = list(texts)
+        futures = [self.submit(texts[i:i + self.chunk_size]) for i in range(0, len(texts), self.chunk_size)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+if __name__ == "__main__":
+    sample = [f"The company reported record profit for quarter {i} and declared a dividend." for i in range(256)]
+    with InferencePool() as pool:
+        start = time.time()
+        pool.analyze_batch(sample)
+        logger.info(f"✅ Scored {len(sample)} texts in {time.time() - start:.2f} seconds")
@@ -0,0 +1,125 @@
+"""
+python -m stock_news_analysis.analysis.model_registry
+"""
+
+import os
+import threading
+import time
+from utility.my_automation_logger import get_logger
+
+try:
+    import psutil
+except ImportError:  # RSS reporting is best effort
+    psutil = None
+
+logger = get_logger('model_registry')
+
+# Every model is loaded on first use and shared by all modules in the process
+_models = {}
+_stats = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+def _rss_mb():
+    if psutil is None:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+
+def _key_lock(key):
+    with _registry_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+def _get_or_load(key, loader):
+    if key in _models:
+        return _models[key]
+
+    with _key_lock(key):
+        if key in _models:
+            return _models[key]
+
+        rss_before = _rss_mb()
+        start = time.time()
+        try:
+            value = loader()
+        except Exception as e:
+            logger.error(f"❌ Failed to load {key}: {e}")
+            value = None
+        load_seconds = time.time() - start
+        rss_after = _rss_mb()
+
+        _stats[key] = {
+            "loaded": value is not None,
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+        }
+        _models[key] = value
+        logger.info(f"📦 Loaded {key} in {load_seconds:.2f}s (RSS Δ {_stats[key]['rss_delta_mb']} MB)")
+        return value
+
+def get_sequence_classifier(model_name):
+    """
+    Returns the shared (tokenizer, model) pair for a Hugging Face sequence classifier.
+
+    The pair is loaded on the first call and reused afterwards. If loading fails the
+    error is logged once and (None, None) is returned on every call.
+    """
+    def load():
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        return tokenizer, model
+
+    return _get_or_load(f"classifier:{model_name}", load) or (None, None)
+
+def get_inference_runner(model_name, backend):
+    """
+    Returns the shared inference runner for a classifier on the given backend
+    (see inference_backend.BACKENDS), or None if the model could not be loaded.
+    """
+    def load():
+        from stock_news_analysis.analysis.inference_backend import build_runner
+
+        tokenizer, model = get_sequence_classifier(model_name)
+        if model is None:
+            raise RuntimeError(f"classifier {model_name} is not available")
+        return build_runner(model_name, tokenizer, model, backend)
+
+    return _get_or_load(f"runner:{backend}:{model_name}", load)
+
+def get_pipeline(task, model_name):
+    """Returns a shared Hugging Face pipeline, built on first use."""
+    def load():
+        from transformers import pipeline
+
+        return pipeline(task, model=model_name)
+
+    return _get_or_load(f"pipeline:{task}:{model_name}", load)
+
+def get_vader():
+    """Returns the shared VADER SentimentIntensityAnalyzer."""
+    def load():
+        from nltk.sentiment import SentimentIntensityAnalyzer
+
+        return SentimentIntensityAnalyzer()
+
+    return _get_or_load("vader", load)
+
+def model_stats():
+    """Returns load time and resident-memory growth for every model loaded so far."""
+    return {key: dict(stats) for key, stats in _stats.items()}
+
+def log_model_stats():
+    if not _stats:
+        logger.info("ℹ️ No models loaded in this process.")
+        return
+    for key, stats in _stats.items():
+        status = "✅" if stats["loaded"] else "❌"
+        logger.info(f"{status} {key}: {stats['load_seconds']}s, RSS Δ {stats['rss_delta_mb']} MB")
+
+if __name__ == "__main__":
+    get_vader()
+    get_sequence_classifier("yiyanghkust/finbert-tone")
+    get_sequence_classifier("yiyanghkust/finbert-tone")  # second call is free
+    log_model_stats()
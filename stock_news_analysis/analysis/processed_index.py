@@ -0,0 +1,153 @@
+"""
+python -m stock_news_analysis.analysis.processed_index
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import pandas as pd
+from pathlib import Path
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('processed_index')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE_DIR / "cache"
+PROCESSED_INDEX_FILE = Path(os.environ.get("PROCESSED_INDEX_PATH", CACHE_DIR / "processed_index.sqlite"))
+
+# Announcement sentiment has been computed and saved
+SENTIMENT = "sentiment"
+# Positive announcement has been checked against the chart/indicator screeners
+CHART = "chart"
+
+INPUT_KEY_COLUMNS = ["SYMBOL", "SUBJECT", "DETAILS", "BROADCAST DATE/TIME", "ATTACHMENT"]
+OUTPUT_KEY_COLUMNS = ["Company", "Headline", "Description", "Time", "pdf_link"]
+
+# Historical outputs replayed into an empty index, per namespace
+BACKFILL_SOURCES = {
+    SENTIMENT: [(BASE_DIR / "output", "process_sentiment_anaylsis_*.csv"),
+                (BASE_DIR / "backup", "process_sentiment_anaylsis_*.csv"),
+                (BASE_DIR / "output" / "parquet" / "sentiment", "*/*.parquet")],
+    CHART: [(BASE_DIR / "output" / "chart_pattern_detect", "chart_pattern_*.csv"),
+            (BASE_DIR / "backup", "chart_pattern_*.csv"),
+            (BASE_DIR / "output" / "parquet" / "chart_pattern", "*/*.parquet")],
+}
+
+def _normalize(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value is pd.NaT:
+        return ""
+    if isinstance(value, pd.Timestamp):
+        # Parquet stores parsed timestamps; key them like the raw NSE strings
+        return value.strftime("%d-%b-%Y %H:%M:%S")
+    return str(value).strip()
+
+def announcement_key(symbol, subject, details, broadcast_time, attachment):
+    """Stable sha1 of the five fields that identify an announcement across every day."""
+    raw = "\0".join(_normalize(v) for v in (symbol, subject, details, broadcast_time, attachment))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def keys_for_frame(df, columns):
+    """Returns one announcement key per row of df, read from `columns` in key order."""
+    if df is None or df.empty:
+        return []
+    return [announcement_key(*values) for values in df[columns].itertuples(index=False, name=None)]
+
+def keys_for_rows(rows, columns=OUTPUT_KEY_COLUMNS):
+    return [announcement_key(*(row.get(column) for column in columns)) for row in rows]
+
+class ProcessedIndex:
+    """
+    Persistent set of processed announcement keys, one namespace per pipeline step.
+
+    Membership is a primary-key lookup, so checking a day's announcements costs the same
+    whether the index holds one day of history or a year of it.
+    """
+
+    def __init__(self, path=PROCESSED_INDEX_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, processed_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def contains_many(self, namespace, keys):
+        """Returns the subset of keys already recorded under namespace."""
+        keys = list(keys)
+        found = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(key for (key,) in self._conn.execute(
+                    f"SELECT key FROM processed WHERE namespace = ? AND key IN ({placeholders})", [namespace, *chunk]
+                ))
+        return found
+
+    def add_many(self, namespace, keys):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO processed (namespace, key, processed_at) VALUES (?, ?, ?)",
+                [(namespace, key, now) for key in keys],
+            )
+            self._conn.commit()
+
+    def count(self, namespace):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM processed WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def filter_new(self, df, namespace, columns):
+        """Returns the rows of df whose key is not yet recorded under namespace."""
+        if df is None or df.empty:
+            return df
+        keys = keys_for_frame(df, columns)
+        seen = self.contains_many(namespace, keys)
+        return df[[key not in seen for key in keys]]
+
+    def backfill(self, namespace):
+        """Seeds an empty namespace from the historical outputs, so existing history isn't reprocessed."""
+        added = 0
+        for directory, pattern in BACKFILL_SOURCES[namespace]:
+            if not directory.exists():
+                continue
+            for path in sorted(directory.glob(pattern)):
+                try:
+                    if path.suffix == ".parquet":
+                        df = pd.read_parquet(path, columns=OUTPUT_KEY_COLUMNS)
+                    else:
+                        df = pd.read_csv(path, usecols=OUTPUT_KEY_COLUMNS)
+                except Exception as e:
+                    logger.warning(f"⚠️ Skipping {path.name} during backfill: {e}")
+                    continue
+                keys = keys_for_frame(df, OUTPUT_KEY_COLUMNS)
+                self.add_many(namespace, keys)
+                added += len(keys)
+        logger.info(f"📇 Backfilled {added} '{namespace}' keys from historical outputs")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_processed_index():
+    """Returns the process-wide ProcessedIndex, backfilling any namespace that is still empty."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProcessedIndex()
+            for namespace in BACKFILL_SOURCES:
+                if _index.count(namespace) == 0:
+                    _index.backfill(namespace)
+        return _index
+
+if __name__ == "__main__":
+    index = get_processed_index()
+    for namespace in BACKFILL_SOURCES:
+        logger.info(f"📇 {namespace}: {index.count(namespace)} processed keys")
@@ -4,159 +4,202 @@ python stock_news_analysis/analysis/read_latest_csv.py
 
 import pandas as pd
 import os
-from datetime import date
+import glob
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE_DIR = "stock_news_analysis"
+PARQUET_DIR = os.path.join(BASE_DIR, "output", "parquet")
+CATALOG_FILE = os.path.join(BASE_DIR, "output", "catalog.json")
+# Chart pattern rows are upserted on these columns; the newest part wins until compaction
+CHART_KEYS = ["Company", "Headline", "Chart_Pattern", "Tech_Indicator"]
+
+def read_catalog():
+    """Returns the output catalog written by data_save_csv, or an empty one if there is none yet."""
+    try:
+        with open(CATALOG_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"datasets": {}}
+
+def catalog_version(dataset=None):
+    """Last-modified time of one dataset (or of any dataset); None when uncatalogued."""
+    catalog = read_catalog()
+    if dataset is None:
+        return catalog.get("last_modified")
+    return catalog["datasets"].get(dataset, {}).get("last_modified")
+
+def list_partitions(dataset):
+    """Returns the dataset's partition dates (YYYY-MM-DD), oldest first."""
+    info = read_catalog()["datasets"].get(dataset)
+    if info:
+        return sorted(info["partitions"])
+
+    # Not catalogued yet: scan the dataset directory
+    dataset_dir = os.path.join(PARQUET_DIR, dataset)
+    if not os.path.exists(dataset_dir):
+        return []
+    return sorted(
+        name.split("=", 1)[1] for name in os.listdir(dataset_dir)
+        if name.startswith("date=") and glob.glob(os.path.join(dataset_dir, name, "*.parquet"))
+    )
 
-def load_latest_data():
-    """Load the latest CSV file from the output directory and filter by datetime range."""
-    # output_dir = os.path.join("stock_news_analysis", "output", "chart_pattern_detect")
-    output_dir = os.path.join("stock_news_analysis", "input")
-    if not os.path.exists(output_dir):
+def _decode_dictionaries(table):
+    """
+    Casts dictionary-encoded columns back to their value type. Dictionary encoding only saves
+    space on disk; as pandas categoricals the columns break arithmetic on mapped values and
+    make value_counts() report categories with no rows.
+    """
+    fields = [
+        pa.field(f.name, f.type.value_type, f.nullable) if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ]
+    return table.cast(pa.schema(fields))
+
+def load_dataset(dataset, days=None, columns=None, unique_keys=None):
+    """
+    Load date partitions of a Parquet dataset into one DataFrame.
+
+    Parameters:
+        dataset (str): Dataset name, e.g. "sentiment" or "chart_pattern".
+        days (list[str]): Partition dates to read; every partition when None.
+        columns (list[str]): Only these columns are read from disk.
+        unique_keys (list[str]): Keep only the newest row per key, for upserted datasets.
+
+    Returns:
+        pd.DataFrame | None: None when no partition matches.
+    """
+    days = list_partitions(dataset) if days is None else days
+    files = []
+    for day in days:
+        files.extend(sorted(glob.glob(os.path.join(PARQUET_DIR, dataset, f"date={day}", "*.parquet"))))
+    if not files:
         return None
-
-    files = [f for f in os.listdir(output_dir) if f.endswith('.csv')]
+    read_columns = columns
+    if columns is not None and unique_keys:
+        read_columns = list(dict.fromkeys([*columns, *unique_keys]))
+    try:
+        table = pa.concat_tables([pq.read_table(f, columns=read_columns) for f in files])
+        df = _decode_dictionaries(table).to_pandas()
+    except FileNotFoundError:
+        # A compaction replaced the parts while we were reading; the merged file is complete
+        return load_dataset(dataset, days, columns, unique_keys)
+    if unique_keys:
+        df = df.drop_duplicates(subset=unique_keys, keep="last").reset_index(drop=True)
+    return df[columns] if columns is not None else df
+
+def load_latest_partition(dataset, columns=None, unique_keys=None):
+    """Load the newest date partition of a Parquet dataset."""
+    latest = read_catalog()["datasets"].get(dataset, {}).get("latest")
+    days = [latest] if latest else list_partitions(dataset)[-1:]
+    if not days:
+        return None
+    return load_dataset(dataset, days=days, columns=columns, unique_keys=unique_keys)
+
+def latest_csv(dataset, directory):
+    """
+    Path of the newest CSV of a file dataset: the catalog's latest partition, or for files
+    that predate the catalog, the newest CSV in `directory`.
+    """
+    latest = read_catalog()["datasets"].get(dataset, {})
+    if latest.get("latest"):
+        path = os.path.join(BASE_DIR, latest["partitions"][latest["latest"]]["path"])
+        if os.path.exists(path):
+            return path
+
+    if not os.path.exists(directory):
+        return None
+    files = [f for f in os.listdir(directory) if f.endswith('.csv')]
     if not files:
         return None
+    latest_file = max(files, key=lambda x: os.path.getctime(os.path.join(directory, x)))
+    return os.path.join(directory, latest_file)
+
+def load_latest_data():
+    """Load the latest downloaded NSE announcement CSV from the input directory."""
+    input_path = latest_csv("nse_input", os.path.join("stock_news_analysis", "input"))
+    if input_path is None:
+        return None
 
-    latest_file = max(files, key=lambda x: os.path.getctime(os.path.join(output_dir, x)))
-    df = pd.read_csv(os.path.join(output_dir, latest_file))
+    df = pd.read_csv(input_path)
 
     return df
 
 def load_latest_positive_data():
-    """Load latest input sentiment file and return only new, positive rows not yet saved in today's chart_pattern file."""
+    """Load latest input sentiment file and return only new, positive rows not yet run through the chart screeners."""
     
-    input_dir = os.path.join("stock_news_analysis", "output")  # input is from output sentiment file
-    output_dir = os.path.join("stock_news_analysis", "output", "chart_pattern_detect")
-
-    if not os.path.exists(input_dir):
-        return None
-
-    # Get latest sentiment file
-    input_files = [f for f in os.listdir(input_dir) if f.endswith('.csv')]
-    if not input_files:
+    input_df = load_latest_data_output_sentiment()
+    if input_df is None:
         return None
 
-    latest_input_file = max(input_files, key=lambda x: os.path.getctime(os.path.join(input_dir, x)))
-    input_path = os.path.join(input_dir, latest_input_file)
-    input_df = pd.read_csv(input_path)
-
     # Filter positive sentiment rows first
     input_df = input_df[input_df["final_sentiment"].isin(["Positive", "Very Positive"])]
 
     if input_df.empty:
         return None
 
-    # Normalize date field for consistent comparison
-    input_df['Time'] = input_df['Time'].astype(str)
+    # Normalize date field for consistent comparison (Parquet already holds parsed timestamps)
+    if not pd.api.types.is_datetime64_any_dtype(input_df['Time']):
+        input_df['Time'] = input_df['Time'].astype(str)
 
-    # Columns to compare
-    compare_columns = ["Company", "Headline", "Description", "Time", "pdf_link"]
+    # Skip announcements already run through the chart screeners on any day
+    from stock_news_analysis.analysis.processed_index import get_processed_index, CHART, OUTPUT_KEY_COLUMNS
 
-    # Today's chart pattern file
-    today_str = date.today().isoformat()
-    output_file = os.path.join(output_dir, f"chart_pattern_{today_str}.csv")
-
-    # If output doesn't exist yet, return all input_df
-    if not os.path.exists(output_file):
-        return input_df
-
-    output_df = pd.read_csv(output_file)
-    output_df['Time'] = output_df['Time'].astype(str)
-
-    # Merge input vs output to detect unprocessed rows
-    merged_df = pd.merge(
-        input_df,
-        output_df[compare_columns],
-        how="left",
-        on=compare_columns,
-        indicator=True
-    )
-
-    new_positive_df = merged_df[merged_df["_merge"] == "left_only"].drop(columns=["_merge"])
+    new_positive_df = get_processed_index().filter_new(input_df, CHART, OUTPUT_KEY_COLUMNS)
 
     return new_positive_df
 
-def load_latest_data_output_sentiment():
-    """Load the latest CSV file from the output directory and filter by datetime range."""
-    # output_dir = os.path.join("stock_news_analysis", "output", "chart_pattern_detect")
-    output_dir = os.path.join("stock_news_analysis", "output")
-    if not os.path.exists(output_dir):
-        return None
+def load_latest_data_output_sentiment(columns=None):
+    """Load the latest sentiment output: the newest Parquet partition, else the latest CSV file."""
+    df = load_latest_partition("sentiment", columns=columns)
+    if df is not None:
+        return df
 
-    files = [f for f in os.listdir(output_dir) if f.endswith('.csv')]
-    if not files:
+    # Days saved before the Parquet store existed
+    csv_path = latest_csv("sentiment_csv", os.path.join("stock_news_analysis", "output"))
+    if csv_path is None:
         return None
 
-    latest_file = max(files, key=lambda x: os.path.getctime(os.path.join(output_dir, x)))
-    df = pd.read_csv(os.path.join(output_dir, latest_file))
+    df = pd.read_csv(csv_path)
 
     return df
 
-def load_latest_data_output_chart_ind():
-    """Load the latest CSV file from the output directory and filter by datetime range."""
-    # output_dir = os.path.join("stock_news_analysis", "output", "chart_pattern_detect")
-    output_dir = os.path.join("stock_news_analysis", "output", "chart_pattern_detect")
-    if not os.path.exists(output_dir):
-        return None
+def load_latest_data_output_chart_ind(columns=None):
+    """Load the latest chart pattern output: the newest Parquet partition, else the latest CSV file."""
+    df = load_latest_partition("chart_pattern", columns=columns, unique_keys=CHART_KEYS)
+    if df is not None:
+        return df
 
-    files = [f for f in os.listdir(output_dir) if f.endswith('.csv')]
-    if not files:
+    # Days saved before the Parquet store existed
+    csv_path = latest_csv("chart_pattern_csv", os.path.join("stock_news_analysis", "output", "chart_pattern_detect"))
+    if csv_path is None:
         return None
 
-    latest_file = max(files, key=lambda x: os.path.getctime(os.path.join(output_dir, x)))
-    df = pd.read_csv(os.path.join(output_dir, latest_file))
+    df = pd.read_csv(csv_path)
+    df = df.drop_duplicates(subset=CHART_KEYS, keep="last")
 
     return df
 
 def load_new_data_to_process():
-    input_dir = os.path.join("stock_news_analysis", "input")
-    output_dir = os.path.join("stock_news_analysis", "output")
-
-    if not os.path.exists(input_dir):
-        return None
-
     # Find latest input CSV file
-    input_files = [f for f in os.listdir(input_dir) if f.endswith('.csv')]
-    if not input_files:
+    input_path = latest_csv("nse_input", os.path.join("stock_news_analysis", "input"))
+    if input_path is None:
         return None
 
-    latest_input_file = max(input_files, key=lambda x: os.path.getctime(os.path.join(input_dir, x)))
-    input_path = os.path.join(input_dir, latest_input_file)
     input_df = pd.read_csv(input_path)
 
-    # Use key columns for comparison
-    input_df['BROADCAST DATE/TIME'] = input_df['BROADCAST DATE/TIME'].astype(str)
-    compare_columns = ["SYMBOL", "SUBJECT", "DETAILS", "BROADCAST DATE/TIME", "ATTACHMENT"]
+    return filter_unprocessed(input_df)
 
-    # Prepare today's output file path
-    today_str = date.today().isoformat()
-    output_file = os.path.join(output_dir, f"process_sentiment_anaylsis_{today_str}.csv")
-
-    if not os.path.exists(output_file):
-        # First time today, return all input
+def filter_unprocessed(input_df):
+    """Drops NSE announcement rows whose sentiment was already saved, today or on an earlier day."""
+    if input_df is None or input_df.empty:
         return input_df
+    input_df['BROADCAST DATE/TIME'] = input_df['BROADCAST DATE/TIME'].astype(str)
 
-    output_df = pd.read_csv(output_file)
-    output_df.rename(columns={
-        "Company": "SYMBOL",
-        "Headline": "SUBJECT",
-        "Description": "DETAILS",
-        "Time": "BROADCAST DATE/TIME",
-        "pdf_link": "ATTACHMENT"
-    }, inplace=True)
-
-    output_df['BROADCAST DATE/TIME'] = output_df['BROADCAST DATE/TIME'].astype(str)
-
-    # Merge to find new data
-    merged_df = pd.merge(
-        input_df,
-        output_df[compare_columns],
-        on=compare_columns,
-        how='left',
-        indicator=True
-    )
+    from stock_news_analysis.analysis.processed_index import get_processed_index, SENTIMENT, INPUT_KEY_COLUMNS
 
-    new_data_df = merged_df[merged_df['_merge'] == 'left_only'].drop(columns=['_merge'])
+    new_data_df = get_processed_index().filter_new(input_df, SENTIMENT, INPUT_KEY_COLUMNS)
 
     return new_data_df
 
@@ -3,9 +3,10 @@ python -m stock_news_analysis.analysis.sentiment_FinBert
 """
 
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch.nn.functional as F
 import os
+from stock_news_analysis.analysis.tokenization import encode_batches
+from stock_news_analysis.analysis.model_registry import get_sequence_classifier
 
 # Strong financial positive keywords (optional for additional boosts, you can adjust or remove)
 strong_positive_keywords = [
@@ -13,25 +14,24 @@ strong_positive_keywords = [
     "new contracts", "joint venture", "buyback", "dividend", "strategic partnership"
 ]
 
-# Load FinBERT model & tokenizer with error handling
+# FinBERT model & tokenizer are shared with sentiment_analysis through the registry
 model_name = "yiyanghkust/finbert-tone"
-try:
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSequenceClassification.from_pretrained(model_name)
-except Exception as e:
-    print(f"[ERROR] Failed to load FinBERT model: {e}")
-    tokenizer = None
-    model = None
 
 # FinBERT labels (specific to FinBERT)
 labels = ['negative', 'neutral', 'positive']
 
 class FinBERTSentimentAnalyzer:
     def __init__(self):
-        self.model = model
-        self.tokenizer = tokenizer
         self.labels = labels
 
+    @property
+    def tokenizer(self):
+        return get_sequence_classifier(model_name)[0]
+
+    @property
+    def model(self):
+        return get_sequence_classifier(model_name)[1]
+
     def analyze(self, text):
         if not isinstance(text, str) or not text.strip():
             return {"finbert": 0, "confidence": 0}, "Neutral"
@@ -39,14 +39,8 @@ class FinBERTSentimentAnalyzer:
         if self.model is None or self.tokenizer is None:
             return {"finbert": 0, "confidence": 0}, "Model Load Error"
 
-        # Encode the text
-        encoded_input = self.tokenizer(
-            text,
-            return_tensors='pt',
-            truncation=True,
-            padding='max_length',
-            max_length=512
-        )
+        # Encode the text (padded only to its own length)
+        _, encoded_input = next(encode_batches(self.tokenizer, [text], batch_size=1, max_length=512))
 
         with torch.no_grad():
             output = self.model(**encoded_input)
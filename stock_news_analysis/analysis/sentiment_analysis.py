@@ -2,13 +2,17 @@
 python -m stock_news_analysis.analysis.sentiment_analysis
 """
 
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from nltk.sentiment import SentimentIntensityAnalyzer
 from textblob import TextBlob
 import numpy as np
-import torch.nn.functional as F
 import os
+from stock_news_analysis.analysis.tokenization import encode_batches, tokenizer_lock
+from stock_news_analysis.analysis.model_registry import get_sequence_classifier, get_inference_runner, get_vader
+from stock_news_analysis.analysis.inference_backend import BACKENDS, SENTIMENT_BACKEND, softmax
+from stock_news_analysis.analysis.sentiment_cache import get_sentiment_cache
+from stock_news_analysis.analysis.sentiment_client import client as server_client
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('sentiment_analysis')
 
 # 🔑 You can add more strong keywords as you discover
 strong_positive_keywords = [
@@ -18,42 +22,128 @@ strong_positive_keywords = [
     "major contract", "foreign investment", "renewable push", "profit surge"
 ]
 
-# Load VADER
-vader_analyzer = SentimentIntensityAnalyzer()
-
-# Load BERTweet
+# Models are loaded lazily through the shared registry on first use
 bertweet_model_name = "cardiffnlp/twitter-roberta-base-sentiment"
-try:
-    bertweet_tokenizer = AutoTokenizer.from_pretrained(bertweet_model_name)
-    bertweet_model = AutoModelForSequenceClassification.from_pretrained(bertweet_model_name)
-except Exception as e:
-    print(f"[ERROR] Failed to load BERTweet model: {e}")
-    bertweet_tokenizer, bertweet_model = None, None
-
-# Load FinBERT
 finbert_model_name = "yiyanghkust/finbert-tone"
-try:
-    finbert_tokenizer = AutoTokenizer.from_pretrained(finbert_model_name)
-    finbert_model = AutoModelForSequenceClassification.from_pretrained(finbert_model_name)
-except Exception as e:
-    print(f"[ERROR] Failed to load FinBERT model: {e}")
-    finbert_tokenizer, finbert_model = None, None
+
+# Bump whenever weights, keywords or combination logic change so cached scores are not reused
+SENTIMENT_MODEL_VERSION = f"{bertweet_model_name}|{finbert_model_name}|v1"
+
+# Sliding-window scoring of long filings
+DOCUMENT_WINDOW_TOKENS = 384
+DOCUMENT_WINDOW_STRIDE = 64
+DOCUMENT_TOKEN_BUDGET = int(os.environ.get("SENTIMENT_DOCUMENT_TOKEN_BUDGET", 2048))
+# Generous chars-per-token bound: no more raw text than this is ever needed for the token budget
+DOCUMENT_CHAR_BUDGET = DOCUMENT_TOKEN_BUDGET * 8
+DOCUMENT_AGGREGATION = os.environ.get("SENTIMENT_DOCUMENT_AGGREGATION", "attention")
+DOCUMENT_ATTENTION_TEMPERATURE = 0.25
+
+# Cascade mode: run VADER/TextBlob first and only escalate ambiguous documents to the transformers
+SENTIMENT_CASCADE = os.environ.get("SENTIMENT_CASCADE", "0") == "1"
+# Distance a cheap score must keep from every label threshold (±0.2, ±0.75) to be accepted
+CASCADE_MARGIN = float(os.environ.get("SENTIMENT_CASCADE_MARGIN", 0.1))
+CASCADE_ROUTINE_MARGIN = float(os.environ.get("SENTIMENT_CASCADE_ROUTINE_MARGIN", 0.05))
+# NSE SUBJECT values that are almost always procedural
+routine_subjects = [
+    "trading window", "investor meet", "analysts/institutional investor meet", "newspaper publication",
+    "copy of newspaper publication", "loss of share certificate", "duplicate share certificate",
+    "certificate under sebi", "compliance certificate", "statement of investor complaints",
+    "change in registrar", "shareholders meeting", "book closure", "record date",
+]
+
+# Ensemble weights; the cheap cascade pass renormalises VADER + TextBlob to the full scale
+ENSEMBLE_WEIGHTS = {"vader": 0.25, "textblob": 0.2, "transformer": 0.25, "finbert": 0.3}
+KEYWORD_BOOST = 0.2
 
 labels_finbert = ['negative', 'neutral', 'positive']
 labels_bertweet = ['NEG', 'NEU', 'POS']
 
 class EnhancedSentimentAnalyzer:
-    def __init__(self):
-        self.vader = vader_analyzer
-        self.bertweet_model = bertweet_model
-        self.bertweet_tokenizer = bertweet_tokenizer
-        self.finbert_model = finbert_model
-        self.finbert_tokenizer = finbert_tokenizer
+    def __init__(self, batch_size=16, use_cache=True, backend=SENTIMENT_BACKEND):
+        self.batch_size = batch_size
+        self.use_cache = use_cache
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        # Quantized / ONNX scores drift slightly from fp32, so each backend gets its own cache entries
+        self.cache_version = f"{SENTIMENT_MODEL_VERSION}|{backend}"
+        self.cascade_stats = {"documents": 0, "escalated": 0, "agreements": 0}
+
+    @property
+    def vader(self):
+        return get_vader()
+
+    @property
+    def bertweet_tokenizer(self):
+        return get_sequence_classifier(bertweet_model_name)[0]
+
+    @property
+    def bertweet_runner(self):
+        return get_inference_runner(bertweet_model_name, self.backend)
+
+    @property
+    def finbert_tokenizer(self):
+        return get_sequence_classifier(finbert_model_name)[0]
+
+    @property
+    def finbert_runner(self):
+        return get_inference_runner(finbert_model_name, self.backend)
 
     def analyze(self, text):
-        if not isinstance(text, str) or not text.strip():
-            return {"combined": 0, "confidence": 0}, "Neutral"
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts):
+        """
+        Scores a list of texts, running each transformer over whole batches instead of one text at a time.
 
+        Parameters:
+            texts (list[str]): Cleaned announcement texts.
+
+        Returns:
+            list[tuple[dict, str]]: One (scores, final_sentiment) pair per input text, in input order.
+        """
+        results = [({"combined": 0, "confidence": 0}, "Neutral") for _ in texts]
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if not valid:
+            return results
+
+        # Identical boilerplate filings are served from the on-disk cache
+        cache = get_sentiment_cache() if self.use_cache else None
+        if cache:
+            cached = cache.get_many([texts[i] for i in valid], self.cache_version)
+            for pos, result in cached.items():
+                results[valid[pos]] = result
+            valid = [i for pos, i in enumerate(valid) if pos not in cached]
+            if not valid:
+                return results
+
+        valid_texts = [texts[i] for i in valid]
+
+        # BERTweet / FinBERT Transformers: POS - NEG, one forward pass per batch
+        models = [(self.bertweet_runner, self.bertweet_tokenizer), (self.finbert_runner, self.finbert_tokenizer)]
+        transformer_scores = self._transformer_scores(*models[0], valid_texts)
+        finbert_scores = self._transformer_scores(*models[1], valid_texts)
+
+        for i, text, transformer_score, finbert_score in zip(valid, valid_texts, transformer_scores, finbert_scores):
+            results[i] = self._combine(text, transformer_score, finbert_score)
+
+        # Scores from a run with a model missing are degraded; don't let them outlive the outage
+        if cache and all(runner and tokenizer for runner, tokenizer in models):
+            cache.put_many([(texts[i], results[i]) for i in valid], self.cache_version)
+        return results
+
+    def _transformer_scores(self, runner, tokenizer, texts):
+        if not (runner and tokenizer):
+            return [0] * len(texts)
+
+        scores = [0] * len(texts)
+        for indices, inputs in encode_batches(tokenizer, texts, batch_size=self.batch_size, max_length=512):
+            probs = softmax(runner.logits(inputs))
+            for i, p in zip(indices, probs):
+                scores[i] = float(p[2] - p[0])
+        return scores
+
+    def _combine(self, text, transformer_score, finbert_score, weights=ENSEMBLE_WEIGHTS):
         text_lower = text.lower()
 
         # VADER
@@ -62,35 +152,14 @@ class EnhancedSentimentAnalyzer:
         # TextBlob
         textblob_score = TextBlob(text).sentiment.polarity
 
-        # BERTweet Transformer
-        transformer_score = 0
-        if self.bertweet_model and self.bertweet_tokenizer:
-            inputs = self.bertweet_tokenizer(text, return_tensors="pt", truncation=True, padding='max_length', max_length=512)
-            with torch.no_grad():
-                outputs = self.bertweet_model(**inputs)
-            probs = F.softmax(outputs.logits, dim=1)[0].numpy()
-            transformer_score = float(probs[2] - probs[0])  # POS - NEG
-
-        # FinBERT Transformer
-        finbert_score = 0
-        if self.finbert_model and self.finbert_tokenizer:
-            inputs = self.finbert_tokenizer(text, return_tensors="pt", truncation=True, padding='max_length', max_length=512)
-            with torch.no_grad():
-                outputs = self.finbert_model(**inputs)
-            probs = F.softmax(outputs.logits, dim=1)[0].numpy()
-            finbert_score = float(probs[2] - probs[0])  # positive - negative
-
-        # Combine all scores (weights can be adjusted)
-        combined_score = (
-            vader_score * 0.25 +
-            textblob_score * 0.2 +
-            transformer_score * 0.25 +
-            finbert_score * 0.3
-        )
+        # Weighted average of the scorers in `weights`, so a subset keeps the full [-1, 1] scale
+        scores = {"vader": vader_score, "textblob": textblob_score,
+                  "transformer": transformer_score, "finbert": finbert_score}
+        combined_score = sum(scores[name] * weight for name, weight in weights.items()) / sum(weights.values())
 
         # Keyword boost
         if any(k in text_lower for k in strong_positive_keywords):
-            combined_score += 0.2  # boost score
+            combined_score += KEYWORD_BOOST  # boost score
 
         # Clip to [-1, 1]
         combined_score = max(-1, min(1, combined_score))
@@ -98,18 +167,6 @@ class EnhancedSentimentAnalyzer:
         # Confidence
         confidence = abs(combined_score)
 
-        # Final Sentiment Category
-        if combined_score >= 0.75:
-            sentiment = "Very Positive"
-        elif combined_score >= 0.2:
-            sentiment = "Positive"
-        elif combined_score <= -0.75:
-            sentiment = "Very Negative"
-        elif combined_score <= -0.2:
-            sentiment = "Negative"
-        else:
-            sentiment = "Neutral"
-
         return {
             "vader": vader_score,
             "textblob": textblob_score,
@@ -117,7 +174,171 @@ class EnhancedSentimentAnalyzer:
             "finbert": finbert_score,
             "combined": combined_score,
             "confidence": confidence
-        }, sentiment
+        }, sentiment_label(combined_score)
+
+    def split_windows(self, text, window_tokens=DOCUMENT_WINDOW_TOKENS, stride=DOCUMENT_WINDOW_STRIDE,
+                      token_budget=DOCUMENT_TOKEN_BUDGET):
+        """
+        Splits a cleaned document into overlapping token windows, stopping at `token_budget` tokens.
+
+        Windows are cut on FinBERT token offsets. The RoBERTa tokenizer splits text differently,
+        but a window of `window_tokens` FinBERT tokens stays well inside 512 tokens for both models.
+        """
+        if not isinstance(text, str) or not text.strip():
+            return []
+
+        # Never tokenize more text than the budget can possibly use
+        text = text[:token_budget * 8]
+        tokenizer = self.finbert_tokenizer
+        if tokenizer is None:
+            char_window = window_tokens * 4
+            return [text[i:i + char_window] for i in range(0, len(text), char_window)]
+
+        with tokenizer_lock(tokenizer):
+            offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        limit = min(len(offsets), token_budget)
+        if limit == 0:
+            return []
+
+        windows = []
+        step = max(1, window_tokens - stride)
+        for start in range(0, limit, step):
+            end = min(start + window_tokens, limit)
+            windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+            if end >= limit:
+                break
+        return windows
+
+    def analyze_documents(self, texts, aggregation=DOCUMENT_AGGREGATION, score_batch=None, subjects=None,
+                          cascade=None, **window_kwargs):
+        """
+        Scores long documents by batch-scoring every token window in one pass and aggregating per document.
+
+        Parameters:
+            texts (list[str]): Cleaned documents.
+            aggregation (str): "max" keeps the most decisive window, "mean" averages all windows,
+                "attention" weights windows by softmax(|combined| / DOCUMENT_ATTENTION_TEMPERATURE).
+            score_batch (callable): Scores a list of window texts; defaults to self.analyze_batch.
+                Pass InferencePool.analyze_batch to score windows on worker processes.
+            subjects (list[str]): Optional NSE SUBJECT per document, used by the cascade prefilter.
+            cascade (bool): Skip the transformers for documents the cheap scorers settle.
+                Defaults to SENTIMENT_CASCADE.
+            **window_kwargs: Forwarded to split_windows (window_tokens, stride, token_budget).
+
+        Returns:
+            list[tuple[dict, str]]: One (scores, final_sentiment) pair per document, in input order.
+        """
+        if aggregation not in ("max", "mean", "attention"):
+            raise ValueError(f"Unknown aggregation '{aggregation}', expected max, mean or attention")
+
+        cascade = SENTIMENT_CASCADE if cascade is None else cascade
+        subjects = subjects if subjects is not None else [None] * len(texts)
+        results = [None] * len(texts)
+        cheap = {}
+        if cascade:
+            for i, (text, subject) in enumerate(zip(texts, subjects)):
+                cheap[i] = self.cheap_scores(text)
+                if not self._needs_escalation(cheap[i][0], subject):
+                    results[i] = cheap[i]
+        escalate = [i for i in range(len(texts)) if results[i] is None]
+
+        score_batch = score_batch or self.analyze_batch
+        windows_per_doc = [self.split_windows(texts[i], **window_kwargs) for i in escalate]
+        flat_windows = [window for windows in windows_per_doc for window in windows]
+        flat_results = score_batch(flat_windows) if flat_windows else []
+
+        position = 0
+        for i, windows in zip(escalate, windows_per_doc):
+            window_results = flat_results[position:position + len(windows)]
+            position += len(windows)
+            results[i] = _aggregate_windows(window_results, aggregation)
+            if cascade:
+                results[i] = (dict(results[i][0], escalated=True), results[i][1])
+
+        if cascade and texts:
+            self._record_cascade(cheap, results, escalate)
+        return results
+
+    def cheap_scores(self, text):
+        """
+        VADER + TextBlob only, with their ensemble weights renormalised to sum to one so the
+        cheap score uses the same label thresholds as the full ensemble. Used by cascade mode
+        for documents that are not escalated.
+        """
+        if not isinstance(text, str) or not text.strip():
+            return {"combined": 0, "confidence": 0}, "Neutral"
+
+        text = text[:DOCUMENT_CHAR_BUDGET]
+        weights = {name: ENSEMBLE_WEIGHTS[name] for name in ("vader", "textblob")}
+        scores, label = self._combine(text, 0.0, 0.0, weights=weights)
+        scores["escalated"] = False
+        return scores, label
+
+    def _needs_escalation(self, scores, subject):
+        if "vader" not in scores:
+            return False  # empty text, nothing for the transformers to add
+
+        vader_score, textblob_score = scores["vader"], scores["textblob"]
+        agree = vader_score * textblob_score > 0 or (abs(vader_score) < 0.05 and abs(textblob_score) < 0.05)
+        if not agree:
+            return True
+
+        margin = CASCADE_ROUTINE_MARGIN if is_routine_subject(subject) else CASCADE_MARGIN
+        distance = min(abs(scores["combined"] - boundary) for boundary in (-0.75, -0.2, 0.2, 0.75))
+        return distance < margin
+
+    def _record_cascade(self, cheap, results, escalate):
+        stats = self.cascade_stats
+        stats["documents"] += len(results)
+        stats["escalated"] += len(escalate)
+        stats["agreements"] += sum(cheap[i][1] == results[i][1] for i in escalate)
+
+        escalation_rate = stats["escalated"] / stats["documents"]
+        agreement_rate = stats["agreements"] / stats["escalated"] if stats["escalated"] else 1.0
+        logger.info(
+            f"🪜 Cascade: escalated {len(escalate)}/{len(results)} this call; "
+            f"running escalation rate {escalation_rate:.1%}, "
+            f"cheap/final agreement on escalated {agreement_rate:.1%}"
+        )
+
+def is_routine_subject(subject):
+    if not isinstance(subject, str):
+        return False
+    subject_lower = subject.lower()
+    return any(s in subject_lower for s in routine_subjects)
+
+def sentiment_label(combined_score):
+    # Final Sentiment Category
+    if combined_score >= 0.75:
+        return "Very Positive"
+    elif combined_score >= 0.2:
+        return "Positive"
+    elif combined_score <= -0.75:
+        return "Very Negative"
+    elif combined_score <= -0.2:
+        return "Negative"
+    return "Neutral"
+
+def _aggregate_windows(window_results, aggregation):
+    scored = [scores for scores, _ in window_results if "transformer" in scores]
+    if not scored:
+        return {"combined": 0, "confidence": 0}, "Neutral"
+    if len(scored) == 1:
+        return dict(scored[0], windows=1), sentiment_label(scored[0]["combined"])
+
+    keys = ("vader", "textblob", "transformer", "finbert", "combined")
+    if aggregation == "max":
+        aggregated = {key: max(scored, key=lambda s: abs(s["combined"]))[key] for key in keys}
+    else:
+        if aggregation == "attention":
+            weights = softmax(np.array([[abs(s["combined"]) / DOCUMENT_ATTENTION_TEMPERATURE for s in scored]]))[0]
+        else:
+            weights = np.full(len(scored), 1 / len(scored))
+        aggregated = {key: float(sum(w * s[key] for w, s in zip(weights, scored))) for key in keys}
+
+    aggregated["confidence"] = abs(aggregated["combined"])
+    aggregated["windows"] = len(scored)
+    return aggregated, sentiment_label(aggregated["combined"])
 
 
 # Singleton instance
@@ -126,6 +347,29 @@ analyzer = EnhancedSentimentAnalyzer()
 def analyze_sentiment(text):
     return analyzer.analyze(text)
 
+def analyze_sentiment_batch(texts):
+    texts = list(texts)
+    # Client mode: use the warm local sentiment server when it is running
+    if server_client.available():
+        results = server_client.analyze_batch(texts)
+        if results is not None:
+            return results
+    return analyzer.analyze_batch(texts)
+
+def analyze_document_sentiment(text, aggregation=DOCUMENT_AGGREGATION, subject=None, cascade=None):
+    return analyze_document_sentiment_batch([text], aggregation=aggregation, subjects=[subject], cascade=cascade)[0]
+
+def analyze_document_sentiment_batch(texts, aggregation=DOCUMENT_AGGREGATION, score_batch=None, subjects=None,
+                                     cascade=None):
+    texts = list(texts)
+    if score_batch is None and server_client.available():
+        results = server_client.analyze_documents(texts, aggregation, subjects=subjects, cascade=cascade)
+        if results is not None:
+            return results
+    return analyzer.analyze_documents(
+        texts, aggregation=aggregation, score_batch=score_batch, subjects=subjects, cascade=cascade
+    )
+
 
 # ✅ Sample Test Run
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+python -m stock_news_analysis.analysis.sentiment_cache
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('sentiment_cache')
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+SENTIMENT_CACHE_FILE = Path(os.environ.get("SENTIMENT_CACHE_PATH", CACHE_DIR / "sentiment_cache.sqlite"))
+SENTIMENT_CACHE_MAX_ENTRIES = int(os.environ.get("SENTIMENT_CACHE_MAX_ENTRIES", 50000))
+SENTIMENT_CACHE_ENABLED = os.environ.get("SENTIMENT_CACHE", "1") != "0"
+
+class SentimentCache:
+    """
+    On-disk sentiment results keyed by sha256(model version + cleaned text).
+
+    Entries are evicted least-recently-used first once the cache holds more than
+    `max_entries` rows. Safe to share between threads; every process opens its own connection.
+    """
+
+    def __init__(self, path=SENTIMENT_CACHE_FILE, max_entries=SENTIMENT_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+            "key TEXT PRIMARY KEY, scores TEXT NOT NULL, label TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sentiment_last_access ON sentiment_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text, version):
+        return hashlib.sha256(f"{version}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts, version):
+        """Returns {index: (scores, label)} for every text already in the cache."""
+        keys = [self.make_key(text, version) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, scores, label FROM sentiment_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update({key: (json.loads(scores), label) for key, scores, label in rows})
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE sentiment_cache SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return {i: found[key] for i, key in enumerate(keys) if key in found}
+
+    def put_many(self, items, version):
+        """Stores [(text, (scores, label)), ...] and evicts the oldest entries beyond max_entries."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(self.make_key(text, version), json.dumps(scores), label, now) for text, (scores, label) in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (key, scores, label, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM sentiment_cache WHERE key IN "
+                    "(SELECT key FROM sentiment_cache ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": entries,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            f"🗃️ Sentiment cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"(hit rate {stats['hit_rate']:.1%}), {stats['entries']} entries"
+        )
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_sentiment_cache():
+    """Returns the process-wide SentimentCache, or None when disabled via SENTIMENT_CACHE=0."""
+    global _cache
+    if not SENTIMENT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = SentimentCache()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Sentiment cache unavailable, running uncached: {e}")
+                return None
+        return _cache
+
+if __name__ == "__main__":
+    cache = get_sentiment_cache()
+    if cache:
+        cache.log_stats()
@@ -0,0 +1,102 @@
+"""
+python -m stock_news_analysis.analysis.sentiment_client
+"""
+
+import os
+import json
+import time
+import urllib.error
+import urllib.request
+
+SENTIMENT_SERVER_HOST = os.environ.get("SENTIMENT_SERVER_HOST", "127.0.0.1")
+SENTIMENT_SERVER_PORT = int(os.environ.get("SENTIMENT_SERVER_PORT", 8765))
+SENTIMENT_SERVER_URL = os.environ.get("SENTIMENT_SERVER_URL", f"http://{SENTIMENT_SERVER_HOST}:{SENTIMENT_SERVER_PORT}")
+# auto = use the server when it answers /health, off = always score in-process
+SENTIMENT_CLIENT_MODE = os.environ.get("SENTIMENT_CLIENT_MODE", "auto")
+# How long to wait for a starting (or warming) server before scoring in-process
+SENTIMENT_SERVER_STARTUP_TIMEOUT = float(os.environ.get("SENTIMENT_SERVER_STARTUP_TIMEOUT", 300))
+
+class SentimentServerClient:
+    """Thin HTTP client for sentiment_server. Kept stdlib-only so the dashboard can import it too."""
+
+    def __init__(self, url=SENTIMENT_SERVER_URL, timeout=300, health_ttl=30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.health_ttl = health_ttl
+        self._healthy = None
+        self._checked_at = 0.0
+
+    def _request(self, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.url}{path}", data=data, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def health(self):
+        """The server's /health payload once its models are loaded, else None."""
+        try:
+            return self._request("/health", timeout=1)
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+
+    def status(self):
+        """"ready", "warming" (listening but still loading models), or None when unreachable."""
+        try:
+            self._request("/health", timeout=1)
+            return "ready"
+        except urllib.error.HTTPError as e:
+            return "warming" if e.code == 503 else None
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+
+    def wait_until_ready(self, timeout=SENTIMENT_SERVER_STARTUP_TIMEOUT, interval=0.5, process=None):
+        """
+        Polls /health until the server is ready; a closed port counts as still starting.
+        Gives up early if `process` (the server's Popen) has exited.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.status() == "ready":
+                self._healthy, self._checked_at = True, time.time()
+                return True
+            if process is not None and process.poll() is not None:
+                return False
+            time.sleep(interval)
+        return False
+
+    def available(self):
+        """
+        True when the server answered /health within the last `health_ttl` seconds. A server
+        that is still warming up is waited for, so its models are not loaded a second time here.
+        """
+        if SENTIMENT_CLIENT_MODE == "off":
+            return False
+        now = time.time()
+        if self._healthy is None or now - self._checked_at > self.health_ttl:
+            status = self.status()
+            self._healthy = status == "ready" or (status == "warming" and self.wait_until_ready())
+            self._checked_at = time.time()
+        return self._healthy
+
+    def _analyze(self, texts, mode, **options):
+        try:
+            response = self._request("/analyze", {"texts": list(texts), "mode": mode, **options})
+        except (urllib.error.URLError, OSError, ValueError):
+            self._healthy = False
+            return None
+        return [(scores, label) for scores, label in response["results"]]
+
+    def analyze_batch(self, texts):
+        """Returns analyze_batch results from the server, or None if it could not be reached."""
+        return self._analyze(texts, "batch")
+
+    def analyze_documents(self, texts, aggregation, subjects=None, cascade=None):
+        """Returns analyze_documents results from the server, or None if it could not be reached."""
+        return self._analyze(texts, "documents", aggregation=aggregation, subjects=subjects, cascade=cascade)
+
+client = SentimentServerClient()
+
+if __name__ == "__main__":
+    print("Sentiment server health:", client.health())
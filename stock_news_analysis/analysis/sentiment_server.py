@@ -0,0 +1,161 @@
+"""
+python -m stock_news_analysis.analysis.sentiment_server
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from stock_news_analysis.analysis.sentiment_analysis import EnhancedSentimentAnalyzer, DOCUMENT_AGGREGATION
+from stock_news_analysis.analysis.sentiment_client import SENTIMENT_SERVER_HOST, SENTIMENT_SERVER_PORT
+from stock_news_analysis.analysis.model_registry import model_stats
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('sentiment_server')
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring requests into one analyze_batch call.
+
+    A batch is dispatched when it reaches `max_batch` texts or when `max_wait_ms` has
+    passed since its first request arrived, whichever comes first.
+    """
+
+    def __init__(self, score_batch, max_batch=64, max_wait_ms=25):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def score(self, texts):
+        """Blocks until every text in `texts` has been scored as part of some micro-batch."""
+        if not texts:
+            return []
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            try:
+                results = self.score_batch(texts)
+            except Exception as e:
+                logger.error(f"❌ Micro-batch of {len(texts)} texts failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            position = 0
+            for item_texts, future in pending:
+                future.set_result(results[position:position + len(item_texts)])
+                position += len(item_texts)
+
+def make_handler(analyzer, batcher, started_at, ready):
+    class SentimentRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            if not ready.is_set():
+                self._send_json(503, {"status": "warming"})
+                return
+            self._send_json(200, {
+                "status": "ok",
+                "uptime_seconds": round(time.time() - started_at, 1),
+                "batches": batcher.batches,
+                "texts": batcher.texts,
+                "models": model_stats(),
+            })
+
+        def do_POST(self):
+            if self.path != "/analyze":
+                self._send_json(404, {"error": "not found"})
+                return
+            if not ready.is_set():
+                self._send_json(503, {"error": "models are still loading"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                texts = payload.get("texts", [])
+                if payload.get("mode") == "documents":
+                    results = analyzer.analyze_documents(
+                        texts,
+                        aggregation=payload.get("aggregation", DOCUMENT_AGGREGATION),
+                        score_batch=batcher.score,
+                        subjects=payload.get("subjects"),
+                        cascade=payload.get("cascade"),
+                    )
+                else:
+                    results = batcher.score(texts)
+            except Exception as e:
+                logger.error(f"❌ Failed to serve /analyze: {e}")
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"results": results})
+
+        def log_message(self, format, *args):
+            pass  # per-request access logs are too noisy
+
+    return SentimentRequestHandler
+
+def warm_up(analyzer, ready):
+    start = time.time()
+    for model in ("vader", "bertweet_tokenizer", "bertweet_runner", "finbert_tokenizer", "finbert_runner"):
+        getattr(analyzer, model)
+    logger.info(f"🔥 Models warm in {time.time() - start:.2f} seconds")
+    ready.set()
+
+def serve(host=SENTIMENT_SERVER_HOST, port=SENTIMENT_SERVER_PORT, max_batch=64, max_wait_ms=25):
+    """
+    Serves the sentiment models on localhost until interrupted.
+
+    The port is bound before the models load, so a client started right after the server
+    sees it warming (503 on /health) and waits instead of loading its own copy.
+    """
+    analyzer = EnhancedSentimentAnalyzer()
+    ready = threading.Event()
+    batcher = MicroBatcher(analyzer.analyze_batch, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(analyzer, batcher, time.time(), ready))
+    logger.info(f"🚀 Sentiment server listening on http://{host}:{port}, loading models")
+    threading.Thread(target=warm_up, args=(analyzer, ready), name="warm-up", daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Sentiment server stopped")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,184 @@
+"""
+python -m stock_news_analysis.analysis.streaming_pipeline
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('streaming_pipeline')
+
+_DONE = object()
+
+class Stage:
+    """
+    One step of a StreamingPipeline.
+
+    Parameters:
+        name (str): Stage name used in logs and stats.
+        fn (callable): job -> job, or None to drop the job. Batch stages get a list of jobs
+            and return a list of the same length.
+        workers (int): Concurrent workers pulling from this stage's input queue.
+        kind (str): "thread" runs fn on threads; "process" runs it on a process pool of
+            `workers` processes (fn and jobs must be picklable).
+        queue_size (int): Bound of the input queue; a full queue blocks the stage upstream.
+        batch_size (int): If set, fn is called with up to this many jobs at once.
+        max_wait (float): Seconds a batch stage waits to fill a batch before running a partial one.
+    """
+
+    def __init__(self, name, fn, workers=1, kind="thread", queue_size=64, batch_size=None, max_wait=0.5):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown stage kind '{kind}', expected thread or process")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.kind = kind
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.input = queue.Queue(maxsize=queue_size)
+        self.stats = {"in": 0, "out": 0, "dropped": 0, "errors": 0, "busy_seconds": 0.0, "max_queue": 0}
+        self._lock = threading.Lock()
+        self._finished_workers = 0
+        self._executor = None
+
+    def _call(self, payload):
+        if self._executor is not None:
+            return self._executor.submit(self.fn, payload).result()
+        return self.fn(payload)
+
+    def _next_batch(self):
+        first = self.input.get()
+        if first is _DONE or not self.batch_size:
+            return first
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.input.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                self.input.put(_DONE)  # leave it for the next read
+                break
+            batch.append(item)
+        return batch
+
+class StreamingPipeline:
+    """
+    Runs jobs through a chain of stages joined by bounded queues.
+
+    Every stage works concurrently, so throughput is set by the slowest stage, and the
+    bounded queues stop a fast stage from racing ahead of a slow one (backpressure).
+    `on_drop(stage_name, job)` is called for every job a stage drops or fails on.
+    """
+
+    def __init__(self, stages, on_drop=None):
+        self.stages = stages
+        self.on_drop = on_drop
+
+    def _drop(self, stage, job):
+        if self.on_drop:
+            try:
+                self.on_drop(stage.name, job)
+            except Exception as e:
+                logger.error(f"❌ on_drop failed in {stage.name}: {e}")
+
+    def _worker(self, stage, downstream):
+        while True:
+            payload = stage._next_batch()
+            if payload is _DONE:
+                with stage._lock:
+                    stage._finished_workers += 1
+                    last = stage._finished_workers == stage.workers
+                if last:
+                    if downstream is not None:
+                        downstream.input.put(_DONE)
+                else:
+                    stage.input.put(_DONE)  # wake the next sibling worker
+                return
+
+            jobs = payload if stage.batch_size else [payload]
+            with stage._lock:
+                stage.stats["in"] += len(jobs)
+                stage.stats["max_queue"] = max(stage.stats["max_queue"], stage.input.qsize())
+
+            start = time.perf_counter()
+            try:
+                results = stage._call(payload)
+                if not stage.batch_size:
+                    results = [results]
+            except Exception as e:
+                logger.error(f"❌ Stage {stage.name} failed on {len(jobs)} job(s): {e}")
+                with stage._lock:
+                    stage.stats["errors"] += len(jobs)
+                results = [None] * len(jobs)
+            elapsed = time.perf_counter() - start
+
+            out = 0
+            for job, result in zip(jobs, results):
+                if result is None:
+                    self._drop(stage, job)
+                    continue
+                out += 1
+                if downstream is not None:
+                    downstream.input.put(result)
+            with stage._lock:
+                stage.stats["busy_seconds"] += elapsed
+                stage.stats["out"] += out
+                stage.stats["dropped"] += len(jobs) - out
+
+    def run(self, source):
+        """Feeds every job from `source` through the stages and blocks until all are done."""
+        start = time.time()
+        threads = []
+        for position, stage in enumerate(self.stages):
+            downstream = self.stages[position + 1] if position + 1 < len(self.stages) else None
+            if stage.kind == "process":
+                stage._executor = ProcessPoolExecutor(max_workers=stage.workers)
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(stage, downstream), name=f"{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for job in source:
+                self.stages[0].input.put(job)
+        finally:
+            self.stages[0].input.put(_DONE)
+            for thread in threads:
+                thread.join()
+            for stage in self.stages:
+                if stage._executor is not None:
+                    stage._executor.shutdown()
+                    stage._executor = None
+
+        self.log_stats(time.time() - start)
+        return {stage.name: dict(stage.stats) for stage in self.stages}
+
+    def log_stats(self, wall_seconds):
+        for stage in self.stages:
+            stats = stage.stats
+            utilisation = stats["busy_seconds"] / (wall_seconds * stage.workers) if wall_seconds else 0
+            logger.info(
+                f"🏭 {stage.name}: {stats['out']}/{stats['in']} out, {stats['dropped']} dropped, "
+                f"{stats['errors']} errors, busy {stats['busy_seconds']:.1f}s "
+                f"({utilisation:.0%} of {stage.workers} {stage.kind} worker(s)), max queue {stats['max_queue']}"
+            )
+        logger.info(f"🏁 Pipeline finished in {wall_seconds:.2f} seconds")
+
+def _square(job):
+    return job * job
+
+if __name__ == "__main__":
+    pipeline = StreamingPipeline([
+        Stage("square", _square, workers=2, kind="process"),
+        Stage("sum", lambda batch: [sum(batch)] * len(batch), batch_size=10),
+    ])
+    pipeline.run(range(100))
@@ -2,9 +2,9 @@
 python -m stock_news_analysis.analysis.text_summarization
 """
 
-from transformers import pipeline
+from stock_news_analysis.analysis.model_registry import get_pipeline
 
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+summarizer_model_name = "facebook/bart-large-cnn"
 
 def summarize_text(text: str, max_chunk_chars: int = 2000) -> str:
     """
@@ -19,6 +19,7 @@ def summarize_text(text: str, max_chunk_chars: int = 2000) -> str:
     """
     chunks = [text[i:i+max_chunk_chars] for i in range(0, len(text), max_chunk_chars)]
     summaries = []
+    summarizer = get_pipeline("summarization", summarizer_model_name)
 
     for chunk in chunks:
         summary = summarizer(chunk, max_length=130, min_length=30, do_sample=False)
@@ -0,0 +1,65 @@
+"""
+python -m stock_news_analysis.analysis.tokenization
+"""
+
+import threading
+import weakref
+
+_locks = weakref.WeakKeyDictionary()
+_locks_guard = threading.Lock()
+
+def tokenizer_lock(tokenizer):
+    """
+    Returns the lock guarding one tokenizer. Fast tokenizers fail with "Already borrowed" when
+    two threads call them at once, and every module shares the registry's tokenizer objects.
+    """
+    with _locks_guard:
+        lock = _locks.get(tokenizer)
+        if lock is None:
+            lock = _locks[tokenizer] = threading.Lock()
+        return lock
+
+def encode_batches(tokenizer, texts, batch_size=16, max_length=512):
+    """
+    Tokenizes texts once and yields length-bucketed batches padded only to their longest member.
+
+    Texts are sorted by token length before being cut into batches, so each batch holds
+    texts of similar length and a short board-meeting notice is never padded to 512 tokens
+    just because a long filing landed in the same batch.
+
+    Parameters:
+        tokenizer: A Hugging Face tokenizer.
+        texts (list[str]): Texts to encode.
+        batch_size (int): Max texts per batch.
+        max_length (int): Truncation length in tokens.
+
+    Yields:
+        tuple[list[int], BatchEncoding]: Indices into `texts` and the padded tensors for that batch.
+    """
+    if not texts:
+        return
+
+    # The lock is never held across a yield, so callers can run inference between batches
+    lock = tokenizer_lock(tokenizer)
+    with lock:
+        encodings = tokenizer(list(texts), truncation=True, max_length=max_length)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        features = {key: [encodings[key][i] for i in indices] for key in encodings.keys()}
+        with lock:
+            batch = tokenizer.pad(features, padding="longest", return_tensors="pt")
+        yield indices, batch
+
+if __name__ == "__main__":
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone")
+    samples = [
+        "Outcome of Board Meeting",
+        "The Board approved the audited financial results for the quarter and recommended a final dividend.",
+        "Closure of trading window",
+    ]
+    for indices, batch in encode_batches(tokenizer, samples, batch_size=2):
+        print(indices, tuple(batch["input_ids"].shape))
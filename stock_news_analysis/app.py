@@ -18,6 +18,8 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from analysis.read_latest_csv import load_latest_data_output_sentiment
 from analysis.read_latest_csv import load_latest_data_output_chart_ind
+from analysis.read_latest_csv import catalog_version
+from analysis.sentiment_client import client as sentiment_server
 
 # Set page config
 st.set_page_config(
@@ -26,11 +28,30 @@ st.set_page_config(
     layout="wide"
 )
 
+VENV_PYTHON = r"D:\Stock_market\NSE-Stock-Scanner\.venv\Scripts\python.exe"
+
+def ensure_sentiment_server():
+    """Start the long-lived sentiment server once and wait until its models are warm, so screener runs reuse them"""
+    status = sentiment_server.status()
+    if status == "ready":
+        return True
+    process = None
+    try:
+        if status is None:
+            process = subprocess.Popen([VENV_PYTHON, "-m", "stock_news_analysis.analysis.sentiment_server"])
+    except Exception as e:
+        st.warning(f"Could not start sentiment server, screener will load models itself: {e}")
+        return False
+    if not sentiment_server.wait_until_ready(process=process):
+        st.warning("Sentiment server did not become ready in time, screener will load models itself")
+        return False
+    return True
+
 def run_screener():
     """Run the daily screener script"""
     try:
-        venv_python = r"D:\Stock_market\NSE-Stock-Scanner\.venv\Scripts\python.exe"
-        subprocess.run([venv_python, "-m", "stock_news_analysis.main"], check=True)
+        ensure_sentiment_server()
+        subprocess.run([VENV_PYTHON, "-m", "stock_news_analysis.main"], check=True)
         return True
     except Exception as e:
         st.error(f"Error running screener: {e}")
@@ -42,6 +63,11 @@ def schedule_screener():
         schedule.run_pending()
         time.sleep(1)
 
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_outputs(version):
+    """Reads the latest outputs; cached per catalog version, so reruns skip unchanged data"""
+    return load_latest_data_output_sentiment(), load_latest_data_output_chart_ind()
+
 def create_sentiment_chart(df):
     """Create an interactive sentiment distribution chart"""
     if df is None or df.empty or 'overall_sentiment' not in df.columns:
@@ -175,8 +201,13 @@ def main():
 
    
  # ---------------------------------------------------------------
-    df_sentiment_data = load_latest_data_output_sentiment()
-    df_chart_ind_data = load_latest_data_output_chart_ind()
+    version = catalog_version()
+    if version is not None:
+        df_sentiment_data, df_chart_ind_data = load_outputs(version)
+    else:
+        # Nothing catalogued yet (CSV-only history), so there is no version to cache on
+        df_sentiment_data = load_latest_data_output_sentiment()
+        df_chart_ind_data = load_latest_data_output_chart_ind()
     view = st.sidebar.radio("Select View", ["Sentiment", "Chart Patterns", "Technical Indicators", "Smart Trade Signals"])
 
     if view == "Sentiment":
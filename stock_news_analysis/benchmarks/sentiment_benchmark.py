@@ -0,0 +1,247 @@
+"""
+python -m stock_news_analysis.benchmarks.sentiment_benchmark --limit 400
+python -m stock_news_analysis.benchmarks.sentiment_benchmark --scorer finbert --limit 400
+python -m stock_news_analysis.benchmarks.sentiment_benchmark --compare results/a.json results/b.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from textblob import TextBlob
+from stock_news_analysis.analysis.clean_extracted_text import advanced_clean_extracted_text
+from stock_news_analysis.analysis.sentiment_analysis import (
+    EnhancedSentimentAnalyzer, bertweet_model_name, finbert_model_name
+)
+from stock_news_analysis.analysis.sentiment_FinBert import FinBERTSentimentAnalyzer
+from stock_news_analysis.analysis.inference_backend import SENTIMENT_BACKEND
+from stock_news_analysis.analysis.model_registry import model_stats, get_vader
+from utility.my_automation_logger import get_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = get_logger('sentiment_benchmark')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+HISTORY_DIRS = [BASE_DIR / "backup", BASE_DIR / "output"]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+TEXT_COLUMNS = ["Description", "DETAILS", "Headline", "SUBJECT"]
+# "finbert" is the ensemble's FinBERT runner; "finbert_analyzer" is sentiment_FinBert's standalone
+# scorer; "documents" is the windowed long-document path main.py runs
+SCORERS = ("clean_extracted_text", "vader", "textblob", "roberta", "finbert", "finbert_analyzer", "combined",
+           "documents")
+
+def load_history_texts(limit=None):
+    """Collects unique announcement texts from the historical CSVs under backup/ and output/."""
+    texts = []
+    seen = set()
+    for directory in HISTORY_DIRS:
+        for csv_file in sorted(directory.rglob("*.csv")):
+            try:
+                df = pd.read_csv(csv_file)
+            except Exception as e:
+                logger.warning(f"⚠️ Skipping {csv_file.name}: {e}")
+                continue
+            for column in TEXT_COLUMNS:
+                if column not in df.columns:
+                    continue
+                for text in df[column].dropna().astype(str):
+                    if text.strip() and text not in seen:
+                        seen.add(text)
+                        texts.append(text)
+    return texts[:limit] if limit else texts
+
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if psutil is not None:
+        info = psutil.Process(os.getpid()).memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    return None
+
+def _percentiles(latencies):
+    values = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+def bench_per_text(name, fn, texts, latency_samples):
+    """Times fn(text) on each text: single-text latency percentiles, then throughput over all texts."""
+    fn(texts[0])  # warm-up / lazy model load
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    elapsed = time.perf_counter() - start
+
+    result = {"texts": len(texts), "texts_per_sec": round(len(texts) / elapsed, 2), **_percentiles(latencies)}
+    logger.info(f"⏱️ {name}: {result}")
+    return result
+
+def bench_batched(name, fn, texts, latency_samples):
+    """Like bench_per_text, but throughput is measured with one batched call over all texts."""
+    fn(texts[:2])
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        fn([text])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    fn(texts)
+    elapsed = time.perf_counter() - start
+
+    result = {"texts": len(texts), "texts_per_sec": round(len(texts) / elapsed, 2), **_percentiles(latencies)}
+    logger.info(f"⏱️ {name}: {result}")
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def bench_scorer(name, texts, latency_samples, backend=SENTIMENT_BACKEND, batch_size=16):
+    """Benchmarks one scorer in the current process; only the models it needs are loaded."""
+    if not texts:
+        raise ValueError("No historical texts found under backup/ or output/")
+    analyzer = EnhancedSentimentAnalyzer(batch_size=batch_size, use_cache=False, backend=backend)
+    if name == "clean_extracted_text":
+        result = bench_per_text(name, advanced_clean_extracted_text, texts, latency_samples)
+    elif name == "vader":
+        result = bench_per_text(name, get_vader().polarity_scores, texts, latency_samples)
+    elif name == "textblob":
+        result = bench_per_text(name, lambda t: TextBlob(t).sentiment.polarity, texts, latency_samples)
+    elif name == "roberta":
+        result = bench_batched(
+            name,
+            lambda batch: analyzer._transformer_scores(analyzer.bertweet_runner, analyzer.bertweet_tokenizer, batch),
+            texts, latency_samples,
+        )
+    elif name == "finbert":
+        result = bench_batched(
+            name,
+            lambda batch: analyzer._transformer_scores(analyzer.finbert_runner, analyzer.finbert_tokenizer, batch),
+            texts, latency_samples,
+        )
+    elif name == "finbert_analyzer":
+        result = bench_per_text(name, FinBERTSentimentAnalyzer().analyze, texts, latency_samples)
+    elif name == "combined":
+        result = bench_batched(name, analyzer.analyze_batch, texts, latency_samples)
+    elif name == "documents":
+        result = bench_batched(name, analyzer.analyze_documents, texts, latency_samples)
+    else:
+        raise ValueError(f"Unknown scorer '{name}', expected one of {SCORERS}")
+
+    # Process-lifetime high-water mark, so only meaningful with one scorer per process
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["model_load"] = model_stats()
+    return result
+
+def _bench_isolated(name, limit, latency_samples, backend, batch_size):
+    """Runs bench_scorer in a fresh interpreter so its peak_rss_mb covers that scorer alone."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / f"{name}.json"
+        subprocess.run(
+            [sys.executable, "-m", "stock_news_analysis.benchmarks.sentiment_benchmark",
+             "--scorer", name, "--limit", str(limit), "--latency-samples", str(latency_samples),
+             "--backend", backend, "--batch-size", str(batch_size), "--output", str(output)],
+            check=True,
+        )
+        return json.loads(output.read_text())
+
+def run_benchmark(limit=400, latency_samples=100, backend=SENTIMENT_BACKEND, batch_size=16):
+    """
+    Benchmarks every scorer, each in its own subprocess. A scorer's peak_rss_mb is the peak
+    RSS of that process: interpreter and imports plus the scorer's own models and buffers.
+    """
+    scorers = {name: _bench_isolated(name, limit, latency_samples, backend, batch_size) for name in SCORERS}
+    model_load = {}
+    for result in scorers.values():
+        model_load.update(result.pop("model_load", {}))
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "backend": backend,
+        "batch_size": batch_size,
+        "models": [bertweet_model_name, finbert_model_name],
+        "model_load": model_load,
+        "peak_rss_mb": max((r["peak_rss_mb"] for r in scorers.values() if r["peak_rss_mb"] is not None), default=None),
+        "scorers": scorers,
+    }
+
+def save_results(results, output=None):
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = RESULTS_DIR / f"sentiment_{stamp}_{results['commit']}_{results['backend']}.json"
+    Path(output).write_text(json.dumps(results, indent=2))
+    logger.info(f"💾 Benchmark results saved to {output}")
+    return output
+
+def compare_results(baseline_path, candidate_path):
+    """Prints texts/sec and p95 change per scorer between two saved benchmark runs."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    candidate = json.loads(Path(candidate_path).read_text())
+    print(f"{'scorer':<22}{'texts/sec':>24}{'p95 ms':>24}")
+    for scorer, base in baseline["scorers"].items():
+        cand = candidate["scorers"].get(scorer)
+        if not cand:
+            continue
+        speedup = cand["texts_per_sec"] / base["texts_per_sec"] if base["texts_per_sec"] else float("nan")
+        print(
+            f"{scorer:<22}{base['texts_per_sec']:>9} → {cand['texts_per_sec']:<8}({speedup:.2f}x)"
+            f"{base['p95_ms']:>9} → {cand['p95_ms']}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentiment throughput and latency benchmark")
+    parser.add_argument("--limit", type=int, default=400, help="max historical texts to replay")
+    parser.add_argument("--latency-samples", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--backend", default=SENTIMENT_BACKEND)
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/...)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    parser.add_argument("--scorer", choices=SCORERS, help="benchmark only this scorer, in this process")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+    elif args.scorer:
+        texts = load_history_texts(args.limit)
+        logger.info(f"📚 Loaded {len(texts)} historical texts")
+        result = bench_scorer(args.scorer, texts, args.latency_samples, args.backend, args.batch_size)
+        if args.output:
+            Path(args.output).write_text(json.dumps(result, indent=2))
+        else:
+            print(json.dumps(result, indent=2))
+    else:
+        results = run_benchmark(args.limit, args.latency_samples, args.backend, args.batch_size)
+        save_results(results, args.output)
@@ -3,32 +3,51 @@ python -m stock_news_analysis.main
 """
 
 import os
+import argparse
 import pandas as pd
 from datetime import date
 from pathlib import Path
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict
+from functools import lru_cache
 
-from stock_news_analysis.analysis.extract_text_from_pdf import extract_text_from_bse_pdf, extract_text_from_nse_xml
+from stock_news_analysis.analysis.extract_text_from_pdf import extract_text_from_bse_pdf, extract_text_from_nse_xml, extract_text_from_pdf_bytes
+from stock_news_analysis.analysis.attachment_downloader import iter_downloads
+from stock_news_analysis.analysis.attachment_cache import get_attachment_cache
 from stock_news_analysis.analysis.clean_extracted_text import advanced_clean_extracted_text
 # from stock_news_analysis.analysis.text_summarization import summarize_text
-from stock_news_analysis.analysis.sentiment_analysis import analyze_sentiment
-from stock_news_analysis.analysis.read_latest_csv import load_latest_data, load_new_data_to_process
-from stock_news_analysis.analysis.data_save_csv import save_to_csv_after_sentiment
+from stock_news_analysis.analysis.sentiment_analysis import analyze_document_sentiment_batch, DOCUMENT_CHAR_BUDGET
+from stock_news_analysis.analysis.read_latest_csv import load_latest_data, load_new_data_to_process, filter_unprocessed
+from stock_news_analysis.analysis.data_save_csv import CheckpointWriter
+from stock_news_analysis.analysis.model_registry import log_model_stats
+from stock_news_analysis.analysis.sentiment_cache import get_sentiment_cache
+from stock_news_analysis.analysis.inference_pool import InferencePool, default_layout
+from stock_news_analysis.analysis.sentiment_client import client as sentiment_server
+from stock_news_analysis.analysis.streaming_pipeline import StreamingPipeline, Stage
 from utility.my_automation_logger import get_logger
 from utility.debbuger_port_driver import get_driver
-from stock_news_analysis.scraping_data_screener.csv_data_nse_annoucement_scrap import get_nse_annoucement_data
+from stock_news_analysis.scraping_data_screener.nse_announcements_api import ingest_nse_announcements, AnnouncementPoller, NSE_INGEST_MODE
 from stock_news_analysis.scraping_data_screener.chart_pattern_scrap import fetch_all_patterns_and_indicators
 from stock_news_analysis.analysis.data_save_csv import save_to_csv_chart_ind
 
 logger = get_logger('screener_announcements')
 
-def process_row(index, total, row):
+PIPELINE_EXTRACT_WORKERS = int(os.environ.get("PIPELINE_EXTRACT_WORKERS", 4))
+# "process" moves PDF parsing off the GIL when extraction is the bottleneck
+PIPELINE_EXTRACT_KIND = os.environ.get("PIPELINE_EXTRACT_KIND", "thread")
+PIPELINE_CLEAN_WORKERS = int(os.environ.get("PIPELINE_CLEAN_WORKERS", 2))
+PIPELINE_INFER_BATCH = int(os.environ.get("PIPELINE_INFER_BATCH", 32))
+PIPELINE_INFER_MAX_WAIT = float(os.environ.get("PIPELINE_INFER_MAX_WAIT", 1.0))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 64))
+
+def is_scorable(row):
+    """Only PDF attachments are scored; XML filings and rows without a link are skipped."""
+    pdf_link = row.get("ATTACHMENT")
+    return isinstance(pdf_link, str) and pdf_link.lower().endswith(".pdf")
+
+def extract_row_text(index, total, row, download=None):
     pdf_link = row.get("ATTACHMENT")
     company = row.get("SYMBOL", "Unknown")
-    headline = row.get("SUBJECT", "")
-    description = row.get("DETAILS", "")
-    time_str = row.get("BROADCAST DATE/TIME", "")
 
     if not pdf_link:
         logger.warning(f"⚠️ Missing PDF link for company: {company}")
@@ -38,7 +57,15 @@ def process_row(index, total, row):
     try:
         # Choose extractor based on file type
         if pdf_link.lower().endswith(".pdf"):
-            text = extract_text_from_bse_pdf(pdf_link)
+            # Skip the letterhead and stop parsing once the document scorer's budget is covered
+            if download is None:
+                text = extract_text_from_bse_pdf(pdf_link, max_chars=DOCUMENT_CHAR_BUDGET, start_offset=300)
+            elif download.error:
+                raise download.error
+            else:
+                text = extract_text_from_pdf_bytes(
+                    download.content, download.content_type, max_chars=DOCUMENT_CHAR_BUDGET, start_offset=300
+                )
         elif pdf_link.lower().endswith(".xml"):
             # text = extract_text_from_nse_xml(pdf_link)
             return
@@ -49,88 +76,206 @@ def process_row(index, total, row):
         if not text or not text.strip():
             logger.warning(f"⚠️ Empty or whitespace-only text extracted from {pdf_link}")
             return None
-        
-        text = advanced_clean_extracted_text(text[300:5000])
 
-        # if len(text) > 2000:
-        #     logger.info("🔍 Using summarization due to long text...")
-        #     summary = summarize_text(text)
-        # else:
-        #     summary = text
+        return text
+    except Exception as e:
+        logger.error(f"❌ Error processing {pdf_link}: {e}")
+        return None
 
-        sentiment_data = analyze_sentiment(text)
+def extract_stage(job):
+    text = extract_row_text(job["index"], job["total"], job["row"], job.pop("download", None))
+    if not text:
+        return None
+    job["text"] = text
+    return job
 
-        sentiment_scores = sentiment_data[0]
-        final_sentiment = sentiment_data[1]
+def clean_stage(job):
+    text = advanced_clean_extracted_text(job["text"])
 
-        vader_score = sentiment_scores.get('vader')
-        textblob_score = sentiment_scores.get('textblob')
-        bert_sentiment = sentiment_scores.get('transformer')
-        confidence = sentiment_scores.get('confidence')
+    # if len(text) > 2000:
+    #     logger.info("🔍 Using summarization due to long text...")
+    #     summary = summarize_text(text)
+    # else:
+    #     summary = text
 
-        if bert_sentiment is None:
-            logger.warning(f"⚠️ Missing 'transformer' sentiment for {pdf_link}")
-            return None
+    if not text:
+        return None
+    job["text"] = text
+    return job
 
-        return {
-            "Company": company,
-            "Headline": headline,
-            "Description": description,
-            "Time": time_str,
-            "pdf_link": pdf_link,
-            "vader_score": vader_score,
-            "textblob_score": textblob_score,
-            "bert_sentiment": bert_sentiment,
-            "confidence": confidence,
-            "final_sentiment": final_sentiment
-        }
-    except Exception as e:
-        logger.error(f"❌ Error processing {pdf_link}: {e}")
+def build_row_result(row, sentiment_data):
+    pdf_link = row.get("ATTACHMENT")
+
+    sentiment_scores = sentiment_data[0]
+    final_sentiment = sentiment_data[1]
+
+    vader_score = sentiment_scores.get('vader')
+    textblob_score = sentiment_scores.get('textblob')
+    bert_sentiment = sentiment_scores.get('transformer')
+    confidence = sentiment_scores.get('confidence')
+
+    if bert_sentiment is None:
+        logger.warning(f"⚠️ Missing 'transformer' sentiment for {pdf_link}")
         return None
+    # The cascade settled this one without the transformers: record NaN, not a neutral 0.0
+    if sentiment_scores.get('escalated') is False:
+        bert_sentiment = float('nan')
 
-def main():
-    try:
-        df = load_new_data_to_process()
-        processed_rows = []
-        failed_links = []
-
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            total = len(df)
-            futures = {
-                executor.submit(process_row, idx + 1, total, row): row
-                for idx, (_, row) in enumerate(df.iterrows())
-            }
-            for future in as_completed(futures):
-                result = future.result()
-                row = futures[future]
-                if result:
-                    processed_rows.append(result)
-                else:
-                    failed_links.append(row.get("ATTACHMENT"))
-
-        if processed_rows:
-            save_to_csv_after_sentiment(processed_rows)
+    return {
+        "Company": row.get("SYMBOL", "Unknown"),
+        "Headline": row.get("SUBJECT", ""),
+        "Description": row.get("DETAILS", ""),
+        "Time": row.get("BROADCAST DATE/TIME", ""),
+        "pdf_link": pdf_link,
+        "vader_score": vader_score,
+        "textblob_score": textblob_score,
+        "bert_sentiment": bert_sentiment,
+        "confidence": confidence,
+        "final_sentiment": final_sentiment
+    }
+
+def open_inference_pool(total):
+    # A running sentiment server already has warm models; otherwise spread large runs
+    # over worker processes, since small ones are cheaper in-process
+    workers, _ = default_layout()
+    if workers <= 1 or total < 16 or sentiment_server.available():
+        return None
+    return InferencePool(workers=workers)
+
+def iter_jobs(rows):
+    """Yields one pipeline job per row; PDF rows are yielded as their downloads complete."""
+    total = len(rows)
+    rows_by_url = defaultdict(list)
+    for idx, row in enumerate(rows):
+        link = row.get("ATTACHMENT")
+        if isinstance(link, str) and link.lower().endswith(".pdf"):
+            rows_by_url[link].append(idx)
         else:
+            yield {"index": idx + 1, "total": total, "row": row}
+
+    for download in iter_downloads(rows_by_url.keys(), maxsize=PIPELINE_QUEUE_SIZE):
+        for idx in rows_by_url[download.url]:
+            yield {"index": idx + 1, "total": total, "row": rows[idx], "download": download}
+
+def main(df=None):
+    """
+    Scores new announcements: `df` (e.g. a poller delta) or else the unprocessed rows of the
+    latest input CSV.
+
+    Returns:
+        pd.DataFrame | None: The PDF rows that could not be scored (empty when every row
+        was), or None if the run failed part-way.
+    """
+    try:
+        df = load_new_data_to_process() if df is None else filter_unprocessed(df)
+        if df is None or df.empty:
+            logger.info("ℹ️ No new announcements to process.")
+            return pd.DataFrame()
+        rows = [row for _, row in df.iterrows()]
+        failed_rows = []
+
+        # Rows checkpointed by an earlier run are already in the processed index and were
+        # skipped by load_new_data_to_process, so a re-run only redoes what the last flush missed
+        logger.info(f"🔁 {len(rows)} rows left to process")
+        pool = open_inference_pool(len(rows))
+        writer = CheckpointWriter()
+
+        def infer_stage(jobs):
+            sentiments = analyze_document_sentiment_batch(
+                [job["text"] for job in jobs],
+                score_batch=pool.analyze_batch if pool else None,
+                subjects=[job["row"].get("SUBJECT", "") for job in jobs],
+            )
+            for job, sentiment_data in zip(jobs, sentiments):
+                job["sentiment"] = sentiment_data
+            return jobs
+
+        def persist_stage(job):
+            if not job["sentiment"]:
+                return None
+            result = build_row_result(job["row"], job["sentiment"])
+            if result:
+                writer.add(result)
+            return result
+
+        # fetch (async downloads) → extract → clean → batched inference → persist, joined
+        # by bounded queues so every stage runs at once and none races ahead of the others
+        pipeline = StreamingPipeline(
+            [
+                Stage("extract", extract_stage, workers=PIPELINE_EXTRACT_WORKERS,
+                      kind=PIPELINE_EXTRACT_KIND, queue_size=PIPELINE_QUEUE_SIZE),
+                Stage("clean", clean_stage, workers=PIPELINE_CLEAN_WORKERS, queue_size=PIPELINE_QUEUE_SIZE),
+                Stage("infer", infer_stage, workers=pool.workers if pool else 1, queue_size=PIPELINE_QUEUE_SIZE,
+                      batch_size=PIPELINE_INFER_BATCH, max_wait=PIPELINE_INFER_MAX_WAIT),
+                Stage("persist", persist_stage, queue_size=PIPELINE_QUEUE_SIZE),
+            ],
+            # Skipped rows are not failures: retrying them could never succeed
+            on_drop=lambda stage, job: failed_rows.append(job["row"]) if is_scorable(job["row"]) else None,
+        )
+        try:
+            pipeline.run(iter_jobs(rows))
+        finally:
+            writer.close()
+            if pool:
+                pool.shutdown()
+
+        if not writer.written:
             logger.info("No valid PDFs were processed.")
 
-        if failed_links:
-            failed_df = pd.DataFrame({"Failed_PDFs": failed_links})
-            failed_df.to_csv("failed_pdfs.csv", index=False)
-            logger.info(f"⚠️ Saved {len(failed_links)} failed PDF links to 'failed_pdfs.csv'.")
+        failed_df = pd.DataFrame(failed_rows, columns=df.columns)
+        if not failed_df.empty:
+            pd.DataFrame({"Failed_PDFs": failed_df["ATTACHMENT"]}).to_csv("failed_pdfs.csv", index=False)
+            logger.info(f"⚠️ Saved {len(failed_df)} failed PDF links to 'failed_pdfs.csv'.")
+        return failed_df
 
     except Exception as e:
         logger.error(f"❌ Failed to read CSV or process data: {e}")
+        return None
+
+POLL_INTERVAL_SECONDS = int(os.environ.get("POLL_INTERVAL_SECONDS", 60))
+
+def watch(interval=POLL_INTERVAL_SECONDS):
+    """Polls NSE every `interval` seconds and scores only each poll's new announcements."""
+    poller = AnnouncementPoller()
+    while True:
+        start = time.time()
+        try:
+            # An uncommitted delta, and any failed rows of a committed one, are polled again
+            failed = main(poller.poll())
+            if failed is not None:
+                poller.commit(failed)
+        except Exception as e:
+            logger.error(f"❌ Poll failed, retrying next interval: {e}")
+        time.sleep(max(0, interval - (time.time() - start)))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score new NSE announcements and scan chart patterns")
+    parser.add_argument("--watch", action="store_true", help="poll NSE continuously instead of running once")
+    args = parser.parse_args()
+    if args.watch:
+        watch()
+
     start = time.time()
-    driver = get_driver()
-    get_nse_annoucement_data(driver)
-    time.sleep(1)  # Ensure data is downloaded before processing
-    main()
+    # Chrome is only attached when the browser ingestion fallback needs it; Chartink leases its own contexts
+    shared_driver = lru_cache(maxsize=1)(get_driver)
+    poller = AnnouncementPoller() if NSE_INGEST_MODE == "api" else None
+    delta = ingest_nse_announcements(driver_factory=shared_driver, poller=poller)
+    if delta is None:
+        time.sleep(1)  # Ensure data is downloaded before processing
+    failed = main(delta)
+    if failed is not None and poller:
+        poller.commit(failed)
     time.sleep(1)
 
-    data = fetch_all_patterns_and_indicators(driver)
+    data = fetch_all_patterns_and_indicators()
     save_to_csv_chart_ind(data)
 
+    log_model_stats()
+    sentiment_cache = get_sentiment_cache()
+    if sentiment_cache:
+        sentiment_cache.log_stats()
+    attachment_cache = get_attachment_cache()
+    if attachment_cache:
+        attachment_cache.log_stats()
     end = time.time()
     logger.info(f"✅ All New Data Processed in {end - start:.2f} seconds")
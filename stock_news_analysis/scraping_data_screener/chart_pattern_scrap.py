@@ -5,59 +5,160 @@ python -m stock_news_analysis.scraping_data_screener.chart_pattern_scrap
 import time
 import pandas as pd
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.ui import WebDriverWait, Select
 from collections import defaultdict
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from utility.debbuger_port_driver import get_driver
+from utility.browser_pool import BrowserPool
 from utility.my_automation_logger import get_logger
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from stock_news_analysis.analysis.read_latest_csv import load_latest_positive_data
 from stock_news_analysis.analysis.data_save_csv import save_to_csv_chart_ind
+from stock_news_analysis.scraping_data_screener.screener_cache import get_screener_cache, SCREENER_TIMEFRAME
 
 # Configuration
 logger = get_logger('screener_announcements')
 
-# Common fetch function
-def fetch_single_url(driver, companies, url, label):
-    results = defaultdict(list)
+# Every row of the results table as cell texts, plus the header texts, in one round trip
+READ_TABLE_JS = """
+const table = Array.from(document.querySelectorAll('table')).find(
+    t => Array.from(t.querySelectorAll('thead th')).some(th => th.innerText.trim().toLowerCase() === 'symbol'));
+if (!table) { return null; }
+return {
+    headers: Array.from(table.querySelectorAll('thead th')).map(th => th.innerText.trim().toLowerCase()),
+    rows: Array.from(table.querySelectorAll('tbody tr')).map(tr => Array.from(tr.cells).map(td => td.innerText.trim())),
+};
+"""
+MAX_RESULT_PAGES = 50
+
+def _name_key(name):
+    return " ".join(str(name).split()[:2]).upper()
+
+def fetch_screener_symbols(driver, url, label):
+    """
+    Loads a Chartink screener once and returns every matched stock as (symbols, name_keys).
+
+    The page-size selector is set to its largest option and the remaining pages are walked
+    with the table's Next button, so a screener costs a handful of page reads regardless
+    of how many companies are checked against it.
+    """
     wait = WebDriverWait(driver, 10)
-    short_wait = WebDriverWait(driver, 1)
-    
+    symbols, name_keys = set(), set()
+
+    driver.get(url)
+    print(f"Opened: {label} -> {url}")
+    try:
+        wait.until(EC.presence_of_element_located((By.XPATH, "//table//th[normalize-space()='Symbol']")))
+        wait.until(lambda d: d.find_elements(By.XPATH, "//table//tbody/tr"))
+    except TimeoutException:
+        print(f"ℹ️ {label}: no results table")
+        return symbols, name_keys
+
+    try:
+        page_size = driver.find_element(By.XPATH, "//select[option[normalize-space()='10']]")
+        Select(page_size).select_by_index(len(Select(page_size).options) - 1)
+        time.sleep(1)
+    except Exception:
+        pass  # single page or no selector
+
+    for _ in range(MAX_RESULT_PAGES):
+        table = driver.execute_script(READ_TABLE_JS)
+        if not table:
+            break
+        headers = table["headers"]
+        symbol_col = headers.index("symbol")
+        name_col = headers.index("stock name") if "stock name" in headers else None
+        for cells in table["rows"]:
+            if len(cells) > symbol_col and cells[symbol_col]:
+                symbols.add(cells[symbol_col].upper())
+            if name_col is not None and len(cells) > name_col and cells[name_col]:
+                name_keys.add(_name_key(cells[name_col]))
+
+        next_buttons = driver.find_elements(
+            By.XPATH, "//*[self::a or self::button or self::li][normalize-space()='Next' and not(contains(@class,'disabled'))]"
+        )
+        if not next_buttons or not next_buttons[0].is_enabled():
+            break
+        first_row = driver.find_element(By.XPATH, "//table//tbody/tr")
+        driver.execute_script("arguments[0].click();", next_buttons[0])
+        try:
+            wait.until(EC.staleness_of(first_row))
+        except TimeoutException:
+            break
+
+    print(f"✅ {label}: {len(symbols)} stocks")
+    return symbols, name_keys
+
+def match_companies(companies, symbols, name_keys):
+    """Companies present in a screener's results, by NSE symbol or by their first two name words."""
+    return [
+        company for company in companies
+        if str(company).upper() in symbols or _name_key(company) in name_keys
+    ]
+
+def cached_screener_symbols(url, timeframe=SCREENER_TIMEFRAME):
+    """Returns a screener's (symbols, name_keys) from the on-disk cache, or None on a miss."""
+    cache = get_screener_cache()
+    return cache.get(url, timeframe) if cache is not None else None
+
+def match_screener(companies, label, symbols, name_keys):
+    results = defaultdict(list)
+    for company in match_companies(companies, symbols, name_keys):
+        results[company].append(label)
+        print(f"✅ {company} -> {label}")
+    return results
+
+# Common fetch function
+def fetch_single_url(driver, companies, url, label, timeframe=SCREENER_TIMEFRAME):
     try:
-        driver.get(url)
-        print(f"Opened: {label} -> {url}")
-        time.sleep(2)
-        
-        for company in companies:
-            try:
-                search_word = " ".join(company.split()[:2])
-                # import pdb; pdb.set_trace()  # Debugging breakpoint
-                search_box = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='search']")))
-                search_box.clear()
-                search_box.send_keys(search_word)
-                time.sleep(1)
-
-                xpath_company = f"//a[starts-with(normalize-space(), '{search_word}')]"
-                short_wait.until(EC.presence_of_element_located((By.XPATH, xpath_company)))
-                results[company].append(label)
-                print(f"✅ {company} -> {label}")
-            except TimeoutException:
-                continue
-            except Exception as e:
-                print(f"⚠️ {company} -> {label} ERROR: {e}")
-                continue
+        symbols, name_keys = fetch_screener_symbols(driver, url, label)
     except Exception as e:
         print(f"❌ Error in {label} scraping: {e}")
-    
-    return results
+        return defaultdict(list)
+
+    cache = get_screener_cache()
+    # An empty result may just be a page that failed to load; scrape it again next run
+    if cache is not None and symbols:
+        try:
+            cache.put(url, symbols, name_keys, timeframe)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache {label} results: {e}")
+    return match_screener(companies, label, symbols, name_keys)
+
+def fetch_parallel_chartink(pool, companies, url_label_dict, timeframe=SCREENER_TIMEFRAME):
+    """
+    Matches companies against every screener in url_label_dict, from the screener cache where
+    it is still fresh and from Chartink otherwise.
 
-def fetch_parallel_chartink(driver, companies, url_label_dict):
+    Each uncached screener leases its own browser context from `pool`, so the screeners load
+    in parallel on separate tabs; a fully cached run never starts a browser.
+    """
     all_results = defaultdict(list)
-    with ThreadPoolExecutor(max_workers=3) as executor:
+    misses = {}
+    for url, label in url_label_dict.items():
+        cached = cached_screener_symbols(url, timeframe)
+        if cached is None:
+            misses[url] = label
+            continue
+        logger.info(f"🗂️ {label}: {len(cached[0])} cached stocks")
+        for k, v in match_screener(companies, label, *cached).items():
+            all_results[k].extend(v)
+
+    if not misses:
+        return all_results
+
+    def leased_fetch(url, label):
+        try:
+            with pool.lease() as driver:
+                return fetch_single_url(driver, companies, url, label, timeframe)
+        except Exception as e:
+            print(f"❌ No browser for {label}: {e}")
+            return defaultdict(list)
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
         futures = {
-            executor.submit(fetch_single_url, driver, companies, url, label): label
-            for url, label in url_label_dict.items()
+            executor.submit(leased_fetch, url, label): label
+            for url, label in misses.items()
         }
         for future in as_completed(futures):
             result = future.result()
@@ -65,7 +166,14 @@ def fetch_parallel_chartink(driver, companies, url_label_dict):
                 all_results[k].extend(v)
     return all_results
 
-def fetch_all_patterns_and_indicators(driver):
+def fetch_all_patterns_and_indicators(driver_factory=None):
+    """
+    Tags new positive announcements with the chart patterns and indicators their company matches.
+
+    Parameters:
+        driver_factory (callable): Starts one WebDriver per browser context; defaults to the
+            BROWSER_POOL_MODE factory.
+    """
     df = load_latest_positive_data()
 
     if df is None or df.empty:
@@ -97,20 +205,26 @@ def fetch_all_patterns_and_indicators(driver):
         # "https://chartink.com/screener/golden-cross-scan":"Golden Cross"
     }
 
-    pattern_results = fetch_parallel_chartink(driver, companies, pattern_urls)
-    indicator_results = fetch_parallel_chartink(driver, companies, indicator_urls)
+    pool = BrowserPool(factory=driver_factory)
+    try:
+        pattern_results = fetch_parallel_chartink(pool, companies, pattern_urls)
+        indicator_results = fetch_parallel_chartink(pool, companies, indicator_urls)
+    finally:
+        pool.log_stats()
+        pool.close()
 
     df['Chart_Pattern'] = df['Company'].apply(lambda x: ', '.join(pattern_results.get(x, [])))
     df['Tech_Indicator'] = df['Company'].apply(lambda x: ', '.join(indicator_results.get(x, [])))
+
+    cache = get_screener_cache()
+    if cache is not None:
+        cache.log_stats()
     return df
 
 if __name__ == "__main__":
-    driver = get_driver()
     start = time.time()
-    data = fetch_all_patterns_and_indicators(driver)
+    data = fetch_all_patterns_and_indicators()
     # print(data)
     save_to_csv_chart_ind(data)
     end = time.time()
     logger.info(f"✅ All New Data Processed in {end - start:.2f} seconds")
-
-    driver.quit()
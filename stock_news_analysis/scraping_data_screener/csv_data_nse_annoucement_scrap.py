@@ -10,6 +10,7 @@ from pathlib import Path
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from stock_news_analysis.analysis.data_save_csv import register_file
 from utility.debbuger_port_driver import get_driver
 from utility.my_automation_logger import get_logger
 
@@ -83,6 +84,15 @@ def get_nse_annoucement_data(driver):
     pyautogui.press('enter')  # Confirm overwrite
     logger.info("🟢 Pressed Left + Enter to confirm overwrite (Yes)")
 
+    # Let loaders find today's file through the catalog instead of comparing ctimes
+    for _ in range(20):
+        if os.path.exists(download_path):
+            register_file("nse_input", download_path, today_str)
+            break
+        time.sleep(0.5)
+    else:
+        logger.warning(f"⚠️ Download not found at {download_path}; it was not catalogued")
+
     return
 
 if __name__ == "__main__":
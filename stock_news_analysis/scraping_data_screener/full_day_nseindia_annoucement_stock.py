@@ -17,7 +17,9 @@ from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
 from stock_news_analysis.analysis.clean_extracted_text import advanced_clean_extracted_text
 from stock_news_analysis.analysis.extract_text_from_pdf import extract_text_from_bse_pdf
-from stock_news_analysis.analysis.sentiment_analysis import analyze_sentiment
+from stock_news_analysis.analysis.sentiment_analysis import analyze_document_sentiment, DOCUMENT_CHAR_BUDGET
+from stock_news_analysis.analysis.data_save_csv import write_parquet_part, BSE_DATASET, OUTPUT_CSV
+from stock_news_analysis.analysis.read_latest_csv import load_dataset
 from utility.debbuger_port_driver import get_driver
 from utility.my_automation_logger import get_logger
 from .chart_pattern_scrap import fetch_all_patterns_and_indicators, save_to_csv_chart_ind
@@ -120,10 +122,10 @@ def fetch_announcements(driver, seen_headlines=None):
                     logger.warning(f"⚠️ PDF link missing for {company} - skipping")
                     continue
 
-                full_text = extract_text_from_bse_pdf(pdf_link)
-                Annoucement_Description = advanced_clean_extracted_text(full_text[400:2000])
+                full_text = extract_text_from_bse_pdf(pdf_link, max_chars=DOCUMENT_CHAR_BUDGET, start_offset=400)
+                Annoucement_Description = advanced_clean_extracted_text(full_text)
 
-                sentiment_analysis_data = analyze_sentiment(Annoucement_Description)
+                sentiment_analysis_data = analyze_document_sentiment(Annoucement_Description, subject=headline)
                 vader_score = sentiment_analysis_data[0]['vader']
                 textblob_score = sentiment_analysis_data[0]['textblob']
                 bert_sentiment = sentiment_analysis_data[0]['transformer']
@@ -163,27 +165,24 @@ def fetch_announcements(driver, seen_headlines=None):
     return announcements
 
 def save_to_csv(new_data):
-    CSV_FILE.parent.mkdir(parents=True, exist_ok=True)
     columns = ["Company", "Headline", "Description", "Time", "pdf_link", "vader_score", "textblob_score", "bert_sentiment", "confidence", "final_sentiment"]
 
-    if CSV_FILE.exists() and CSV_FILE.stat().st_size > 0:
-        try:
-            old_df = pd.read_csv(CSV_FILE)
-            old_links = set(old_df["pdf_link"])
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to read existing CSV: {e}")
-            old_links = set()
-            old_df = pd.DataFrame(columns=columns)
-
-        new_entries = [row for row in new_data if row["pdf_link"] not in old_links]
-        if new_entries:
-            pd.DataFrame(new_entries).to_csv(CSV_FILE, mode='a', header=False, index=False)
-            logger.info(f"✅ Appended {len(new_entries)} new rows.")
-        else:
-            logger.info("ℹ️ No new announcements.")
-    else:
-        pd.DataFrame(new_data, columns=columns).to_csv(CSV_FILE, index=False)
-        logger.info(f"✅ Created new CSV with {len(new_data)} entries: {CSV_FILE.name}")
+    # Only the pdf_link column is read back to find what today's partition already holds
+    old_df = load_dataset(BSE_DATASET, days=[today_str], columns=["pdf_link"])
+    old_links = set(old_df["pdf_link"]) if old_df is not None else set()
+
+    new_entries = [row for row in new_data if row["pdf_link"] not in old_links]
+    if not new_entries:
+        logger.info("ℹ️ No new announcements.")
+        return
+
+    write_parquet_part(BSE_DATASET, pd.DataFrame(new_entries, columns=columns))
+    logger.info(f"✅ Saved {len(new_entries)} new rows to {BSE_DATASET}/{today_str}")
+
+    if OUTPUT_CSV:
+        CSV_FILE.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not CSV_FILE.exists() or CSV_FILE.stat().st_size == 0
+        pd.DataFrame(new_entries, columns=columns).to_csv(CSV_FILE, mode='a', header=write_header, index=False)
 
 def test_data(driver, seen_headlines=None):
     """
@@ -278,10 +277,10 @@ def test_data(driver, seen_headlines=None):
                     logger.warning(f"⚠️ PDF link missing for {company} - skipping")
                     continue
 
-                full_text = extract_text_from_bse_pdf(pdf_link)
-                Annoucement_Description = advanced_clean_extracted_text(full_text[400:2000])
+                full_text = extract_text_from_bse_pdf(pdf_link, max_chars=DOCUMENT_CHAR_BUDGET, start_offset=400)
+                Annoucement_Description = advanced_clean_extracted_text(full_text)
 
-                sentiment_analysis_data = analyze_sentiment(Annoucement_Description)
+                sentiment_analysis_data = analyze_document_sentiment(Annoucement_Description, subject=headline)
                 vader_score = sentiment_analysis_data[0]['vader']
                 textblob_score = sentiment_analysis_data[0]['textblob']
                 bert_sentiment = sentiment_analysis_data[0]['transformer']
@@ -330,7 +329,8 @@ if __name__ == "__main__":
         # data = test_data(driver, seen)
         save_to_csv(data)
         time.sleep(2)
-        chart_ind_data = fetch_all_patterns_and_indicators(driver)
+        # The screeners lease their own browser contexts, which the pool closes when it is done
+        chart_ind_data = fetch_all_patterns_and_indicators()
         save_to_csv_chart_ind(chart_ind_data)
     finally:
         driver.quit()
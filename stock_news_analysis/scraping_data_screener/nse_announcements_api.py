@@ -0,0 +1,313 @@
+"""
+python -m stock_news_analysis.scraping_data_screener.nse_announcements_api
+python -m stock_news_analysis.scraping_data_screener.nse_announcements_api --base-url http://127.0.0.1:8000
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+import pandas as pd
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from utility.http_client import new_session, default_timeout, EXCHANGE_HEADERS
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('download_nse_announcements')
+
+# Point at a local stand-in server to test without touching nseindia.com
+NSE_BASE_URL = os.environ.get("NSE_BASE_URL", "https://www.nseindia.com").rstrip("/")
+# "api" pulls JSON over HTTP (falls back to the browser on failure); "browser" always uses Selenium
+NSE_INGEST_MODE = os.environ.get("NSE_INGEST_MODE", "api")
+BOOTSTRAP_PATH = "/companies-listing/corporate-filings-announcements"
+ANNOUNCEMENTS_PATH = "/api/corporate-announcements"
+
+INPUT_DIR = Path(__file__).resolve().parent.parent / "input"
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+NSE_POLL_STATE_FILE = Path(os.environ.get("NSE_POLL_STATE_PATH", CACHE_DIR / "nse_poll_state.json"))
+# Announcements can be disseminated out of order; re-check this far behind the watermark
+NSE_POLL_OVERLAP_SECONDS = int(os.environ.get("NSE_POLL_OVERLAP_SECONDS", 300))
+# Times a failed announcement is re-emitted before the poller gives up on it for the day
+NSE_POLL_MAX_ATTEMPTS = int(os.environ.get("NSE_POLL_MAX_ATTEMPTS", 3))
+TIME_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+# nse_csv_data_<date>.csv column <- API field
+CSV_FIELDS = {
+    "SYMBOL": "symbol",
+    "COMPANY NAME": "sm_name",
+    "SUBJECT": "desc",
+    "DETAILS": "attchmntText",
+    "BROADCAST DATE/TIME": "an_dt",
+    "RECEIPT": "sort_date",
+    "DISSEMINATION": "exchdisstime",
+    "DIFFERENCE": "difference",
+    "ATTACHMENT": "attchmntFile",
+    "FILE SIZE": "attFileSize",
+}
+
+class NseApiClient:
+    """
+    Pooled HTTP client for NSE's JSON API.
+
+    NSE only answers API calls that carry the cookies its HTML pages set, so the client loads
+    the announcements page once to collect them and reuses them for every call. A 401/403
+    means they expired: they are re-bootstrapped once and the call is retried.
+    """
+
+    def __init__(self, base_url=NSE_BASE_URL):
+        self.base_url = base_url.rstrip("/")
+        self.session = new_session(headers={
+            **EXCHANGE_HEADERS,
+            "Accept": "application/json, text/plain, */*",
+            "Referer": f"{self.base_url}{BOOTSTRAP_PATH}",
+        })
+        self._bootstrapped = False
+
+    def bootstrap(self):
+        response = self.session.get(f"{self.base_url}{BOOTSTRAP_PATH}", timeout=default_timeout(),
+                                    headers={"Accept": "text/html"})
+        response.raise_for_status()
+        self._bootstrapped = True
+        logger.info(f"🍪 Bootstrapped NSE session cookies ({len(self.session.cookies)} set)")
+
+    def get_json(self, path, params=None):
+        """
+        Raises:
+            requests.HTTPError: If the API still answers with an error after a re-bootstrap.
+        """
+        if not self._bootstrapped:
+            self.bootstrap()
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=default_timeout())
+        if response.status_code in (401, 403):
+            self.bootstrap()
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=default_timeout())
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_announcements(self, from_date, to_date=None, index="equities"):
+        """Returns the raw announcement records between two dates (inclusive)."""
+        to_date = to_date or from_date
+        payload = self.get_json(ANNOUNCEMENTS_PATH, params={
+            "index": index,
+            "from_date": from_date.strftime("%d-%m-%Y"),
+            "to_date": to_date.strftime("%d-%m-%Y"),
+        })
+        # The endpoint answers with a bare list, or {"data": [...]} for some filters
+        return payload.get("data", []) if isinstance(payload, dict) else payload
+
+def announcements_to_frame(records):
+    """Maps API records onto the columns of the downloaded nse_csv_data_<date>.csv."""
+    rows = [{column: record.get(field) for column, field in CSV_FIELDS.items()} for record in records]
+    return pd.DataFrame(rows, columns=list(CSV_FIELDS))
+
+def announcement_ids(records, df):
+    """NSE's seq_id per record, or the announcement key when a record has none."""
+    from stock_news_analysis.analysis.processed_index import announcement_key, INPUT_KEY_COLUMNS
+
+    return [
+        str(record.get("seq_id") or announcement_key(*values))
+        for record, values in zip(records, df[INPUT_KEY_COLUMNS].itertuples(index=False, name=None))
+    ]
+
+def save_announcements_csv(df, path, day=None):
+    """Writes `day`'s frame like NSE's own download (UTF-8 BOM, every field quoted), atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".csv.tmp")
+    df.to_csv(tmp_path, index=False, quoting=csv.QUOTE_ALL, encoding="utf-8-sig")
+    os.replace(tmp_path, path)
+
+    from stock_news_analysis.analysis.data_save_csv import register_file
+    register_file("nse_input", path, day.isoformat() if day else None)
+
+def fetch_nse_announcements_api(day=None, client=None, output_path=None):
+    """
+    Pulls one day's equity announcements over HTTP and saves them as nse_csv_data_<date>.csv.
+
+    Returns:
+        pd.DataFrame: The announcements, with the same columns as the browser download.
+    """
+    day = day or date.today()
+    start = time.time()
+    client = client or NseApiClient()
+    df = announcements_to_frame(client.fetch_announcements(day))
+    output_path = output_path or INPUT_DIR / f"nse_csv_data_{day.isoformat()}.csv"
+    save_announcements_csv(df, output_path, day)
+    logger.info(f"⬇️ Ingested {len(df)} NSE announcements via API in {time.time() - start:.2f} seconds")
+    return df
+
+class AnnouncementPoller:
+    """
+    Incremental NSE announcement poller with a persistent watermark.
+
+    The state file keeps the day, the newest BROADCAST DATE/TIME seen, the IDs seen in the
+    last NSE_POLL_OVERLAP_SECONDS before it (plus any undated IDs, for the rest of the day), and
+    the failed IDs still to retry with their attempt counts. A poll returns the announcements
+    that are newer than the watermark minus the overlap and not already seen, plus the retries,
+    and the day's input CSV is refreshed with the full listing. The new state is only persisted
+    by commit(), once the delta has been processed, so a crashed run re-emits the same delta.
+    """
+
+    def __init__(self, client=None, state_path=NSE_POLL_STATE_FILE, overlap_seconds=NSE_POLL_OVERLAP_SECONDS,
+                 max_attempts=NSE_POLL_MAX_ATTEMPTS):
+        self.client = client or NseApiClient()
+        self.state_path = Path(state_path)
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.max_attempts = max_attempts
+        self._pending = None
+        self._pending_rows = {}
+
+    def load_state(self, day):
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (FileNotFoundError, ValueError):
+            state = {}
+        if state.get("day") != day.isoformat():
+            return {"day": day.isoformat(), "watermark": None, "seen": {}, "retry": {}}
+        state.setdefault("retry", {})
+        return state
+
+    def poll(self, day=None):
+        """Returns a DataFrame of announcements not emitted by an earlier committed poll."""
+        from stock_news_analysis.analysis.processed_index import keys_for_frame, INPUT_KEY_COLUMNS
+
+        day = day or date.today()
+        start = time.time()
+        state = self.load_state(day)
+
+        records = self.client.fetch_announcements(day)
+        df = announcements_to_frame(records)
+        ids = announcement_ids(records, df)
+        times = pd.to_datetime(df["BROADCAST DATE/TIME"], format=TIME_FORMAT, errors="coerce")
+
+        watermark = datetime.fromisoformat(state["watermark"]) if state["watermark"] else None
+        cutoff = watermark - self.overlap if watermark else None
+        seen = state["seen"]
+        retry = state["retry"]
+        is_new = [
+            announcement_id in retry
+            or (announcement_id not in seen and (cutoff is None or pd.isna(ts) or ts >= cutoff))
+            for announcement_id, ts in zip(ids, times)
+        ]
+        delta = df[is_new].reset_index(drop=True)
+
+        # Next state: advance the watermark and keep only IDs inside the new overlap window.
+        # Undated IDs can't be windowed, so they stay seen until the day rolls over.
+        newest = times.max()
+        new_watermark = watermark
+        if pd.notna(newest) and (watermark is None or newest > watermark):
+            new_watermark = newest.to_pydatetime()
+        new_cutoff = new_watermark - self.overlap if new_watermark else None
+        new_seen = {
+            i: t for i, t in seen.items()
+            if t is None or new_cutoff is None or datetime.fromisoformat(t) >= new_cutoff
+        }
+        for announcement_id, ts, new in zip(ids, times, is_new):
+            if not new:
+                continue
+            if pd.isna(ts):
+                new_seen[announcement_id] = None
+            elif new_cutoff is None or ts >= new_cutoff:
+                new_seen[announcement_id] = ts.isoformat()
+        self._pending = {
+            "day": day.isoformat(),
+            "watermark": new_watermark.isoformat() if new_watermark else None,
+            "seen": new_seen,
+            "retry": dict(retry),
+        }
+        delta_ids = [i for i, new in zip(ids, is_new) if new]
+        self._pending_rows = dict(zip(keys_for_frame(delta, INPUT_KEY_COLUMNS), delta_ids))
+
+        if not delta.empty:
+            # Keep the day's full listing on disk, exactly like a browser download
+            save_announcements_csv(df, INPUT_DIR / f"nse_csv_data_{day.isoformat()}.csv", day)
+        logger.info(
+            f"📡 Polled {len(df)} NSE announcements, {len(delta)} new or retried since "
+            f"{state['watermark'] or 'start of day'} ({time.time() - start:.2f} seconds)"
+        )
+        return delta
+
+    def commit(self, failed=None):
+        """
+        Persists the watermark of the last poll; call once its delta has been processed.
+
+        Parameters:
+            failed (pd.DataFrame): Rows of the delta that could not be processed. Each is
+                re-emitted by the next poll until it has failed `max_attempts` times; the
+                watermark still advances past them.
+        """
+        if self._pending is None:
+            return
+        state = self._pending
+        retry = state["retry"]
+        failed_ids = set()
+        if failed is not None and not failed.empty:
+            from stock_news_analysis.analysis.processed_index import keys_for_frame, INPUT_KEY_COLUMNS
+
+            failed_ids = {
+                self._pending_rows[key] for key in keys_for_frame(failed, INPUT_KEY_COLUMNS)
+                if key in self._pending_rows
+            }
+
+        retried, given_up = 0, 0
+        for announcement_id in self._pending_rows.values():
+            if announcement_id not in failed_ids:
+                retry.pop(announcement_id, None)
+                continue
+            attempts = retry.get(announcement_id, 0) + 1
+            if attempts >= self.max_attempts:
+                retry.pop(announcement_id, None)
+                given_up += 1
+            else:
+                retry[announcement_id] = attempts
+                retried += 1
+        if retried:
+            logger.info(f"🔁 {retried} failed announcements will be polled again")
+        if given_up:
+            logger.warning(f"⚠️ Giving up on {given_up} announcements after {self.max_attempts} failed attempts")
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, self.state_path)
+        self._pending = None
+        self._pending_rows = {}
+
+def ingest_nse_announcements(driver_factory=None, mode=NSE_INGEST_MODE, poller=None):
+    """
+    Refreshes today's NSE announcement CSV using NSE_INGEST_MODE.
+
+    Parameters:
+        driver_factory (callable): Returns a Selenium driver for the browser path; only
+            called when the browser is actually needed.
+        mode (str): "api" or "browser".
+        poller (AnnouncementPoller): In api mode, return only the poller's delta.
+
+    Returns:
+        pd.DataFrame | None: The announcements to process, or None after a browser download
+        (the caller then reads the CSV).
+    """
+    if mode == "api":
+        try:
+            if poller is not None:
+                return poller.poll()
+            return fetch_nse_announcements_api()
+        except Exception as e:
+            if driver_factory is None:
+                raise
+            logger.warning(f"⚠️ NSE API ingestion failed, falling back to the browser: {e}")
+
+    # Imported lazily: pyautogui needs a desktop session, which the API path does not
+    from stock_news_analysis.scraping_data_screener.csv_data_nse_annoucement_scrap import get_nse_annoucement_data
+    get_nse_annoucement_data(driver_factory())
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch today's NSE announcements over HTTP")
+    parser.add_argument("--base-url", default=NSE_BASE_URL)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD")
+    parser.add_argument("--output", help="CSV path (default: input/nse_csv_data_<date>.csv)")
+    args = parser.parse_args()
+
+    fetch_nse_announcements_api(args.date, NseApiClient(args.base_url), args.output)
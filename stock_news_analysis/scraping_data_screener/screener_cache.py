@@ -0,0 +1,165 @@
+"""
+python -m stock_news_analysis.scraping_data_screener.screener_cache
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('screener_cache')
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+SCREENER_CACHE_FILE = Path(os.environ.get("SCREENER_CACHE_PATH", CACHE_DIR / "screener_cache.sqlite"))
+SCREENER_CACHE_ENABLED = os.environ.get("SCREENER_CACHE", "1") != "0"
+# 0 = keep results until the screener's next candle close
+SCREENER_CACHE_TTL_SECONDS = int(os.environ.get("SCREENER_CACHE_TTL_SECONDS", 0))
+SCREENER_TIMEFRAME = os.environ.get("SCREENER_TIMEFRAME", "1d")
+
+MARKET_TZ = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = (9, 15)
+MARKET_CLOSE = (15, 30)
+
+def _session_bounds(day):
+    open_at = day.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    close_at = day.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return open_at, close_at
+
+def _next_trading_day(day):
+    day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+def validate_timeframe(timeframe):
+    """
+    Raises:
+        ValueError: Unless timeframe is "1d", "1w", or a number of minutes/hours such as "15m" or "1h".
+    """
+    if timeframe in ("1d", "1w"):
+        return timeframe
+    if timeframe[-1:] in ("m", "h") and timeframe[:-1].isdigit() and int(timeframe[:-1]) > 0:
+        return timeframe
+    raise ValueError(f"Unsupported screener timeframe '{timeframe}', expected 1d, 1w, <minutes>m or <hours>h")
+
+def next_candle_close(timeframe=SCREENER_TIMEFRAME, now=None):
+    """
+    Returns when the current `timeframe` candle closes, in IST.
+
+    Intraday candles are counted from the 09:15 open and the last one is cut at the close.
+    Weekends are skipped; exchange holidays are not known here, so on a holiday results are
+    simply refreshed one day early.
+    """
+    validate_timeframe(timeframe)
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    open_at, close_at = _session_bounds(now)
+    if now.weekday() >= 5 or now >= close_at:
+        open_at, close_at = _session_bounds(_next_trading_day(now))
+        now = open_at
+
+    if timeframe == "1d":
+        return close_at
+    if timeframe == "1w":
+        return close_at + timedelta(days=4 - close_at.weekday())
+
+    minutes = int(timeframe[:-1]) * (60 if timeframe.endswith("h") else 1)
+    elapsed = max(0, (now - open_at).total_seconds() // 60)
+    candle_close = open_at + timedelta(minutes=(elapsed // minutes + 1) * minutes)
+    return min(candle_close, close_at)
+
+# Checked once at import: a bad SCREENER_TIMEFRAME disables the cache instead of failing every write
+try:
+    validate_timeframe(SCREENER_TIMEFRAME)
+    SCREENER_TIMEFRAME_VALID = True
+except ValueError as e:
+    logger.warning(f"⚠️ Screener cache disabled: {e}")
+    SCREENER_TIMEFRAME_VALID = False
+
+class ScreenerCache:
+    """
+    On-disk cache of each screener's matched stocks, keyed by (screener URL, timeframe).
+
+    An entry stays valid until `ttl_seconds` have passed or, with no TTL set, until the next
+    candle close of its timeframe, since a screener's matches cannot change before then.
+    """
+
+    def __init__(self, path=SCREENER_CACHE_FILE, ttl_seconds=SCREENER_CACHE_TTL_SECONDS):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS screener_cache ("
+            "url TEXT NOT NULL, timeframe TEXT NOT NULL, symbols TEXT NOT NULL, name_keys TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (url, timeframe))"
+        )
+        self._conn.commit()
+
+    def _expiry(self, timeframe):
+        if self.ttl_seconds > 0:
+            return time.time() + self.ttl_seconds
+        return next_candle_close(timeframe).timestamp()
+
+    def get(self, url, timeframe=SCREENER_TIMEFRAME):
+        """Returns (symbols, name_keys) while the entry is fresh, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT symbols, name_keys, expires_at FROM screener_cache WHERE url = ? AND timeframe = ?",
+                (url, timeframe),
+            ).fetchone()
+            if row is None or row[2] <= time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+        return set(json.loads(row[0])), set(json.loads(row[1]))
+
+    def put(self, url, symbols, name_keys, timeframe=SCREENER_TIMEFRAME):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO screener_cache (url, timeframe, symbols, name_keys, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, timeframe, json.dumps(sorted(symbols)), json.dumps(sorted(name_keys)),
+                 time.time(), self._expiry(timeframe)),
+            )
+            self._conn.commit()
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        logger.info(
+            f"🗂️ Screener cache: {self.hits} hits, {self.misses} misses "
+            f"(hit rate {self.hits / total if total else 0:.1%})"
+        )
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_screener_cache():
+    """
+    Returns the process-wide ScreenerCache, or None when disabled via SCREENER_CACHE=0 or
+    when SCREENER_TIMEFRAME is not a supported timeframe.
+    """
+    global _cache
+    if not (SCREENER_CACHE_ENABLED and SCREENER_TIMEFRAME_VALID):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ScreenerCache()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Screener cache unavailable, scraping every run: {e}")
+                return None
+        return _cache
+
+if __name__ == "__main__":
+    for timeframe in ("15m", "1h", "1d", "1w"):
+        logger.info(f"🕯️ Next {timeframe} candle close: {next_candle_close(timeframe)}")
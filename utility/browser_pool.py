@@ -0,0 +1,155 @@
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from utility.debbuger_port_driver import get_driver, get_headless_driver
+from utility.my_automation_logger import get_logger
+
+logger = get_logger('browser_pool')
+
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 3))
+# "attach": one session + tab per context in the debugging Chrome; "headless": one headless Chrome per context
+BROWSER_POOL_MODE = os.environ.get("BROWSER_POOL_MODE", "attach")
+BROWSER_POOL_LEASE_TIMEOUT = float(os.environ.get("BROWSER_POOL_LEASE_TIMEOUT", 300))
+
+class BrowserContext:
+    """
+    One isolated browser context: its own WebDriver session and, when attached to a shared
+    Chrome, its own tab, so navigating it never disturbs another context.
+    """
+
+    def __init__(self, driver, own_tab):
+        self.driver = driver
+        self.own_tab = own_tab
+        if own_tab:
+            self.driver.switch_to.new_window("tab")
+        self.handle = self.driver.current_window_handle
+
+    def is_healthy(self):
+        try:
+            self.driver.switch_to.window(self.handle)
+            self.driver.execute_script("return document.readyState")
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        try:
+            if self.own_tab:
+                self.driver.switch_to.window(self.handle)
+                self.driver.close()
+        except Exception:
+            pass
+        try:
+            # Against a debugging Chrome this only ends the session; the browser keeps running
+            self.driver.quit()
+        except Exception:
+            pass
+
+class BrowserPool:
+    """
+    Fixed-size pool of browser contexts leased to one job at a time.
+
+    Contexts are created on first demand, so a pool nobody leases from never starts a
+    browser. A context is health-checked before every lease and replaced if its session or
+    tab has died. Lease waits and busy time are recorded for log_stats().
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, factory=None, mode=BROWSER_POOL_MODE,
+                 lease_timeout=BROWSER_POOL_LEASE_TIMEOUT):
+        self.size = size
+        self.mode = mode
+        self.factory = factory or (get_headless_driver if mode == "headless" else get_driver)
+        self.lease_timeout = lease_timeout
+        self._idle = queue.LifoQueue()
+        self._contexts = []
+        self._lock = threading.Lock()
+        self._started = None
+        self.stats = {"leases": 0, "created": 0, "replaced": 0, "wait_seconds": 0.0,
+                      "busy_seconds": 0.0, "in_use": 0, "max_in_use": 0}
+
+    def _create(self):
+        context = BrowserContext(self.factory(), own_tab=self.mode == "attach")
+        with self._lock:
+            self._contexts.append(context)
+            self.stats["created"] += 1
+        return context
+
+    def _discard(self, context):
+        context.close()
+        with self._lock:
+            if context in self._contexts:
+                self._contexts.remove(context)
+
+    def _acquire(self):
+        with self._lock:
+            grow = not self._idle.qsize() and len(self._contexts) < self.size
+            if grow:
+                # Reserve the slot before the (slow) browser start so concurrent leases don't overshoot
+                self._contexts.append(None)
+        if grow:
+            try:
+                return self._create()
+            finally:
+                with self._lock:
+                    self._contexts.remove(None)
+
+        try:
+            context = self._idle.get(timeout=self.lease_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No browser context free after {self.lease_timeout:.0f} seconds")
+        if context.is_healthy():
+            return context
+        logger.warning("⚠️ Browser context failed its health check; replacing it")
+        self._discard(context)
+        with self._lock:
+            self.stats["replaced"] += 1
+        return self._create()
+
+    @contextmanager
+    def lease(self):
+        """Yields a WebDriver for one job; the context goes back to the pool afterwards."""
+        requested = time.time()
+        context = self._acquire()
+        leased = time.time()
+        with self._lock:
+            self._started = self._started or requested
+            self.stats["leases"] += 1
+            self.stats["wait_seconds"] += leased - requested
+            self.stats["in_use"] += 1
+            self.stats["max_in_use"] = max(self.stats["max_in_use"], self.stats["in_use"])
+        try:
+            yield context.driver
+        finally:
+            with self._lock:
+                self.stats["busy_seconds"] += time.time() - leased
+                self.stats["in_use"] -= 1
+            self._idle.put(context)
+
+    def utilisation(self):
+        """Share of the pool's context-seconds spent leased since the first lease."""
+        if self._started is None:
+            return 0.0
+        capacity = self.size * (time.time() - self._started)
+        return self.stats["busy_seconds"] / capacity if capacity else 0.0
+
+    def log_stats(self):
+        stats = self.stats
+        if not stats["leases"]:
+            return
+        logger.info(
+            f"🧭 Browser pool ({self.mode}, size {self.size}): {stats['leases']} leases, "
+            f"{stats['created']} contexts created, {stats['replaced']} replaced, "
+            f"max {stats['max_in_use']} in use, avg wait {stats['wait_seconds'] / stats['leases']:.2f}s, "
+            f"utilisation {self.utilisation():.0%}"
+        )
+
+    def close(self):
+        with self._lock:
+            contexts = [c for c in self._contexts if c is not None]
+            self._contexts = []
+        for context in contexts:
+            context.close()
+        while not self._idle.empty():
+            self._idle.get_nowait()
@@ -8,4 +8,11 @@ DEBUGGER_ADDRESS = "127.0.0.1:9222"  # Chrome must be launched with --remote-deb
 def get_driver():
     opts = Options()
     opts.debugger_address = DEBUGGER_ADDRESS
-    return webdriver.Chrome(service=Service(CHROME_DRIVER_PATH), options=opts)
\ No newline at end of file
+    return webdriver.Chrome(service=Service(CHROME_DRIVER_PATH), options=opts)
+
+def get_headless_driver():
+    """A fresh headless Chrome with its own temporary profile, isolated from every other driver."""
+    opts = Options()
+    opts.add_argument("--headless=new")
+    opts.add_argument("--window-size=1366,900")
+    return webdriver.Chrome(service=Service(CHROME_DRIVER_PATH), options=opts)
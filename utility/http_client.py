@@ -0,0 +1,86 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# What NSE/BSE expect on attachment and API requests. Sent per request (or on an exchange-only
+# session), never on the shared session, so they don't leak to other hosts such as Upstox.
+EXCHANGE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Referer": "https://www.nseindia.com/"
+}
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", 0.5))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 16))
+
+def new_session(headers=None, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF, pool_size=HTTP_POOL_SIZE):
+    """
+    Create a requests.Session with keep-alive connection pooling and bounded retries.
+
+    Retries cover connection errors, read timeouts and 500/502/503/504 responses with
+    exponential backoff (backoff * 2**attempt). Only idempotent methods (GET/HEAD) are
+    retried, so order placement POSTs are never sent twice.
+
+    Args:
+        headers (dict, optional): Default headers for every request made with this session.
+        retries (int): Max retries per request.
+        backoff (float): Backoff factor in seconds.
+        pool_size (int): Connections kept alive per host.
+
+    Returns:
+        requests.Session: A configured session.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Return the process-wide shared session. It is safe to use from several threads:
+    urllib3 keeps a thread-safe connection pool per host.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+def default_timeout():
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+def fetch(url, headers=None, timeout=None, **kwargs):
+    """
+    GET a URL through the shared pooled session.
+
+    Args:
+        url (str): URL to fetch.
+        headers (dict, optional): Per-request headers.
+        timeout (float | tuple, optional): Overrides (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT).
+        **kwargs: Passed through to requests.Session.get.
+
+    Returns:
+        requests.Response: The response. Status is not checked here.
+    """
+    return get_session().get(url, headers=headers, timeout=timeout or default_timeout(), **kwargs)